@@ -1,32 +1,125 @@
 # region Librerías necesarias
 import pandas as pd
+import numpy as np
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 import threading
-from datetime import datetime
-from openpyxl import load_workbook
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from itertools import product
-from bs4 import BeautifulSoup
-from langdetect import detect, DetectorFactory
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+from contextlib import closing, contextmanager
+import queue
+from bs4 import BeautifulSoup, SoupStrainer
+from langdetect import detect_langs, DetectorFactory
 import math
 import json
 import re
 import io
+import sqlite3
+import os
+import hashlib
+import shutil
+import asyncio
+import httpx
+from urllib.parse import urlparse
 from tqdm import tqdm
 from codecarbon import OfflineEmissionsTracker
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
 # endregion
 # region Configuracion General
 # region Configuración general de URLs y parámetros de ejecución
 CROSSREF_API = "https://api.crossref.org/works"
 IEPNB_API = "https://iepnb.gob.es/api/catalogo/v_listapatronespecie_normas"
 EXCEL_URL = "https://www.miteco.gob.es/content/dam/miteco/es/biodiversidad/servicios/banco-datos-naturaleza/recursos/listas/lista-patron-especies-silvestres-con-normativa.xlsx"
-OUTPUT_FILE = "ROSAL_IA_VM1.xlsx"
+OUTPUT_FILE = "ROSAL_IA_VM1.xlsx"            # Exportación Excel opcional
+OUTPUT_DATASET = "ROSAL_IA_VM1_parquet"      # Dataset Parquet con los artículos limpios (salida principal)
+EXPORT_EXCEL = False                         # Exportar también a Excel al terminar (openpyxl es lento)
+INCREMENTAL_REFRESH = False                  # Pedir a CrossRef solo lo indexado desde la última ejecución de cada especie y añadirlo a OUTPUT_DATASET
+CHECKPOINT_DIR = "ROSAL_IA_VM1_checkpoint"  # Artículos por especie y manifiesto para reanudar ejecuciones
 DELAY_BETWEEN_REQUESTS = 4  # Segundos entre peticiones a la API
 RETRY_BACKOFF = 30           # Tiempo de espera tras recibir código 429
 MAX_RETRIES = 10             # Reintentos máximos por fallo
+CROSSREF_GENUS_BUDGET = 350  # Artículos máximos de CrossRef por género (independiente del tamaño de la ejecución)
+CROSSREF_PAGE_SIZE = 100     # Artículos por página con paginación por cursor (CrossRef admite hasta 1000)
 DetectorFactory.seed = 0  # Para resultados reproducibles con langdetect
+LANG_CONFIDENCE_THRESHOLD = 0.99  # Probabilidad mínima de inglés para no tener que revisar el abstract frase a frase
+LANG_BACKEND = "langdetect"       # Detector de idioma: "langdetect" (reproducible) o "langid" (py3langid, n-gramas, mucho más rápido)
+LANG_WORKERS = os.cpu_count() or 1  # Procesos para detectar idiomas de columnas completas en paralelo
+LANG_PARALLEL_MIN = 500           # Abstracts mínimos para que compense repartir la detección entre procesos
+LANG_MP_START_METHOD = "spawn"    # Arranque de los procesos de detección: "spawn" no hereda hilos ni locks del proceso padre
+CACHE_DB = "ROSAL_IA_cache.sqlite"  # Caché persistente compartida por el fetcher y el reporter
+DOI_CACHE_TTL = 30 * 24 * 3600      # Validez de los metadatos cacheados por DOI (segundos)
+DOI_CACHE_MAX_ENTRIES = 200000      # Máximo de DOIs en caché antes de expulsar los menos usados
+DOI_CACHE_CHECK_EVERY = 1000        # Inserciones de cada hilo entre dos comprobaciones del tamaño de la caché
+# Primera espera (segundos) antes de volver a buscar el abstract de un DOI en el que no se encontró, por motivo.
+# Cada nuevo fallo dobla la espera, hasta ABSTRACT_MISS_MAX_TTL
+ABSTRACT_MISS_TTL = {
+    "not_found": 30 * 24 * 3600,    # La web del artículo responde 404/410
+    "paywall": 14 * 24 * 3600,      # La web responde 401/402/403
+    "no_abstract": 7 * 24 * 3600,   # La web se leyó pero no tiene abstract, ni Semantic Scholar
+    "timeout": 6 * 3600,            # La web no respondió a tiempo
+    "error": 24 * 3600,             # Cualquier otro error (5xx, conexión...)
+}
+ABSTRACT_MISS_MAX_TTL = 180 * 24 * 3600
+# Campos de CrossRef que se conservan en caché (el resto, p. ej. referencias, solo ocupa espacio)
+CROSSREF_FIELDS = ["DOI", "title", "author", "issued", "published-online", "published-print", "abstract", "URL"]
+# Peticiones simultáneas máximas por host, compartidas por el motor asíncrono y http_get (5 es el límite de CrossRef, somos conservadores)
+HOST_CONCURRENCY = {
+    "api.crossref.org": 4,
+    "api.semanticscholar.org": 1,
+    "doi.org": 8,                   # Solo redirige a la editorial: responde rápido y sin cuerpo
+    "dx.doi.org": 8,
+}
+DEFAULT_HOST_CONCURRENCY = 4        # Resto de hosts (webs de editoriales)
+# Peticiones por segundo por host (token bucket). En CrossRef se ajusta con sus cabeceras X-Rate-Limit-*
+HOST_RATE_LIMITS = {
+    "api.crossref.org": 5,
+    "api.semanticscholar.org": 1,
+    "iepnb.gob.es": 5,
+    "doi.org": 10,
+    "dx.doi.org": 10,
+}
+DEFAULT_HOST_RATE_LIMIT = 2         # Resto de hosts (webs de editoriales)
+MIN_HOST_RATE = 0.05                # Ritmo mínimo tras 429 consecutivos (peticiones/segundo)
+RATE_LIMIT_SAFETY = 0.8             # Fracción del límite anunciado por el servidor que usamos
+HTTP_MAX_REDIRECTS = 10             # Saltos de redirección máximos por petición en el motor asíncrono
+# Conexiones keep-alive que se mantienen abiertas por host en la sesión HTTP compartida
+HTTP_POOL_SIZES = {
+    "api.crossref.org": 8,
+    "api.semanticscholar.org": 2,
+    "iepnb.gob.es": 4,
+}
+DEFAULT_HTTP_POOL_SIZE = 4          # Resto de hosts (webs de editoriales)
+HTTP_MAX_CONNECTIONS = 64           # Conexiones simultáneas totales del cliente asíncrono
+HTTP_KEEPALIVE_EXPIRY = 30          # Segundos que se conserva una conexión ociosa
+HTTP_HEADERS = {
+    "User-Agent": "ROSAL.IA/1.0 (https://github.com/AEDI-IA/Ai.dea)",
+    "Accept-Encoding": "gzip, deflate",
+}
+HTTP_TIMEOUT = 60                   # Timeout por defecto de las peticiones asíncronas (segundos)
+SEMANTIC_SCHOLAR_API = "https://api.semanticscholar.org/graph/v1"
+SEMANTIC_SCHOLAR_API_KEY = os.environ.get("SEMANTIC_SCHOLAR_API_KEY")  # Clave opcional de Semantic Scholar (más cuota)
+SEMANTIC_SCHOLAR_BATCH_SIZE = 500   # DOIs por petición a /paper/batch (máximo de la API)
+SEMANTIC_SCHOLAR_BATCH_WAIT = 2     # Segundos que se esperan más DOIs (de cualquier especie) antes de enviar un lote incompleto
+PIPELINE_QUEUE_SIZE = 200           # Elementos máximos en cada cola entre etapas del pipeline (back-pressure)
+PIPELINE_WORKERS = {                # Hilos de cada etapa del pipeline, según su cuello de botella
+    "search": 4,                    # Búsquedas en CrossRef (comparten con la resolución los huecos de HOST_CONCURRENCY)
+    "resolve": 8,                   # DOIs incompletos pedidos a CrossRef
+    "enrich": 64,                   # Webs de editoriales y Semantic Scholar: muchos hosts y lentos
+}
+WEB_ABSTRACT_MAX_BYTES = 2 * 1024 * 1024  # Bytes máximos que se leen de la web de un artículo
+WEB_ABSTRACT_CONTENT_TYPES = ["text/html", "application/xhtml+xml"]  # Tipos de contenido en los que se busca el abstract
+SPECIES_LIST_TTL = 24 * 3600        # Validez de las listas de especies cacheadas por filtros (segundos)
+SPECIES_LIST_WORKERS = 4            # Páginas de IEPNB que se piden a la vez
+SPECIES_LIST_LOCAL = True           # Resolver con el Excel de MITECO (get_filter_df) los filtros que lo permitan, sin llamar a IEPNB
+CATALOG_SNAPSHOT = "MITECO_catalogo.feather"  # Copia local del Excel de MITECO en formato Arrow (se carga con memory map)
+CATALOG_META = "MITECO_catalogo.json"         # ETag, Last-Modified y última revalidación de la copia local
+CATALOG_MAX_AGE = 7 * 24 * 3600               # Segundos antes de revalidar la copia local con MITECO
 # endregion
 # region Configuración de tracker de emisiones
 pue = 1.12
@@ -37,30 +130,11 @@ cloud_region='europe-southwest1'
 country_2letter_iso_code = 'ES'
 measure_power_secs = 30
 save_to_file=False
-
-tracker = OfflineEmissionsTracker(
-        country_iso_code=country_iso_code,
-        region=region,
-        cloud_provider=cloud_provider,
-        cloud_region=cloud_region,
-        country_2letter_iso_code=country_2letter_iso_code,
-        measure_power_secs=measure_power_secs,
-        pue=pue,
-        save_to_file= save_to_file
-        )
+# El tracker se crea y arranca en el punto de entrada principal
 # endregion
 # region Configuración de registro (log) a consola y archivo
-timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-log_filename = f"ROSALIA_FETCHER_LOG_{timestamp}.txt"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_filename, mode='w', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# Los handlers (consola y ROSALIA_FETCHER_LOG_*.txt) se configuran en el punto de entrada principal,
+# así importar el módulo (p. ej. desde los procesos de detección de idioma) no crea ni vacía ficheros de log
 log = logging.info  # Alias para usar el log como si fuera print()
 
 # Variables de control globales
@@ -68,39 +142,748 @@ completed_species = 0             # Contador de especies procesadas
 lock = threading.Lock()          # Bloqueo para manejo seguro entre hilos
 total_requests = 0               # Total de peticiones realizadas a Semantic Scholar
 
-# Carga de filtros dinámicos desde Excel oficial
-response = requests.get(EXCEL_URL)
-response.raise_for_status()
-filter_df = pd.read_excel(io.BytesIO(response.content), sheet_name=1)
+# Los filtros dinámicos salen del Excel oficial de MITECO, que se carga en el primer uso (get_filter_df)
 # endregion
 # endregion
 # region configuración de filtrado 
-# Extracción de columnas filtrables desde el archivo
-FILTER_OPTIONS = {
-    col: sorted(filter_df[col].dropna().unique().tolist())
-    for col in [
-        "WithoutAutorship", "kingdom", "phylum", "class", "order", "family", "genus", "subgenus",
-        "specificepithet", "infraspecificepithet", "taxonRank", "ScientificNameAuthorship",
-        "taxonRemarks", "Vernacular Name", "Origen", "Environment", "Grupo taxonómico",
-        "ScientificName", "Nombre en normativa", "Normativa", "Categoría",
-        "Observaciones población", "Ámbito normativa", "Año normativa"
-    ] if col in filter_df.columns
-}
+# Columnas filtrables del Excel
+FILTER_COLUMNS = [
+    "WithoutAutorship", "kingdom", "phylum", "class", "order", "family", "genus", "subgenus",
+    "specificepithet", "infraspecificepithet", "taxonRank", "ScientificNameAuthorship",
+    "taxonRemarks", "Vernacular Name", "Origen", "Environment", "Grupo taxonómico",
+    "ScientificName", "Nombre en normativa", "Normativa", "Categoría",
+    "Observaciones población", "Ámbito normativa", "Año normativa"
+]
+
+def get_filter_key_map():
+    """Mapeo directo de nombres de filtro a columnas de la API."""
+    return {key: key for key in get_filter_options()}
+# endregion
+
+# region --- CATÁLOGO DE ESPECIES DE MITECO --- #
+
+def read_catalog_meta():
+    """Devuelve los metadatos de la copia local del catálogo (ETag, Last-Modified, última revalidación), o {} si no hay."""
+    try:
+        with open(CATALOG_META, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_catalog_meta(meta):
+    """Guarda los metadatos de la copia local del catálogo de forma atómica."""
+    tmp_path = f"{CATALOG_META}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, CATALOG_META)
+
+def normalize_catalog_columns(df):
+    """
+    Arrow necesita un único tipo por columna: las columnas de objetos que mezclan tipos
+    (p. ej. texto y números) se guardan como texto. Los nulos se conservan.
+
+    Args:
+        df (pd.DataFrame): Hoja del Excel de MITECO.
+
+    Returns:
+        pd.DataFrame: El mismo DataFrame, listo para escribir en Feather.
+    """
+    for col in df.columns[df.dtypes == object]:
+        if df[col].dropna().map(type).nunique() > 1:
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+def refresh_catalog_snapshot(force=False):
+    """
+    Asegura una copia local reciente del Excel de MITECO en CATALOG_SNAPSHOT (Feather).
+
+    Flujo:
+        - Si la copia existe y se revalidó hace menos de CATALOG_MAX_AGE, no toca la red.
+        - Si no, pide el Excel con If-None-Match / If-Modified-Since: un 304 solo renueva la fecha de revalidación.
+        - Si hay un Excel nuevo, lo lee una única vez con openpyxl y lo guarda como Feather.
+        - Si MITECO no responde y ya hay copia, se sigue usando la existente.
+
+    Args:
+        force (bool): Revalida aunque la copia local sea reciente.
+
+    Returns:
+        str: Ruta de la copia local.
+    """
+    meta = read_catalog_meta()
+    has_snapshot = os.path.exists(CATALOG_SNAPSHOT)
+    if has_snapshot and not force and time.time() - meta.get("checked_at", 0) < CATALOG_MAX_AGE:
+        return CATALOG_SNAPSHOT
+
+    # Las cabeceras comunes (HTTP_HEADERS) ya vienen de la sesión compartida
+    headers = {}
+    if has_snapshot:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        response = http_get(EXCEL_URL, headers=headers, timeout=HTTP_TIMEOUT)
+        if response.status_code == 304 and has_snapshot:
+            meta["checked_at"] = time.time()
+            write_catalog_meta(meta)
+            log("Catálogo de MITECO sin cambios; se usa la copia local.")
+            return CATALOG_SNAPSHOT
+        response.raise_for_status()
+    except requests.RequestException as e:
+        if has_snapshot:
+            log(f"⚠️ No se pudo revalidar el catálogo de MITECO ({e}); se usa la copia local.")
+            return CATALOG_SNAPSHOT
+        raise
+
+    df = normalize_catalog_columns(pd.read_excel(io.BytesIO(response.content), sheet_name=1))
+    tmp_path = f"{CATALOG_SNAPSHOT}.tmp"
+    feather.write_feather(df, tmp_path)
+    os.replace(tmp_path, CATALOG_SNAPSHOT)
+    write_catalog_meta({
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked_at": time.time(),
+    })
+    log(f"Catálogo de MITECO descargado y guardado en {CATALOG_SNAPSHOT} ({len(df)} filas).")
+    return CATALOG_SNAPSHOT
+
+def load_catalog():
+    """
+    Carga el catálogo de especies de MITECO desde la copia local, revalidándola antes si toca.
+    El fichero Feather se abre con memory map, sin pasar de nuevo por openpyxl, y las columnas
+    quedan respaldadas por Arrow (pd.ArrowDtype) sobre ese mismo mapa, sin copiarlas a NumPy.
+
+    Returns:
+        pd.DataFrame: Hoja de especies del Excel de MITECO.
+    """
+    return feather.read_table(refresh_catalog_snapshot(), memory_map=True).to_pandas(types_mapper=pd.ArrowDtype)
+
+# endregion
+
+# region --- CACHÉ DE METADATOS POR DOI --- #
+
+_cache_local = threading.local()  # Una conexión SQLite por hilo
+
+def normalize_doi(doi):
+    """
+    Normaliza un DOI para usarlo como clave de caché (sin prefijo de resolución y en minúsculas).
+
+    Args:
+        doi (str): DOI tal y como lo devuelve CrossRef o el usuario.
+
+    Returns:
+        str: DOI normalizado.
+    """
+    doi = (doi or "").strip().lower()
+    return re.sub(r'^(https?://(dx\.)?doi\.org/|doi:\s*)', '', doi)
+
+def get_cache_connection():
+    """
+    Devuelve la conexión SQLite del hilo actual a la caché persistente, creando el esquema si no existe.
+    El modo WAL permite que el fetcher y el reporter lean y escriban la misma caché a la vez.
+
+    Returns:
+        sqlite3.Connection: Conexión a CACHE_DB.
+    """
+    conn = getattr(_cache_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_DB, timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS doi_cache ("
+            "doi TEXT PRIMARY KEY, item TEXT NOT NULL, fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_doi_cache_accessed ON doi_cache (accessed_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS abstract_miss ("
+            "doi TEXT PRIMARY KEY, reason TEXT NOT NULL, failures INTEGER NOT NULL, "
+            "checked_at REAL NOT NULL, retry_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_abstract_miss_retry ON abstract_miss (retry_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS species_refresh ("
+            "species TEXT PRIMARY KEY, index_date TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.commit()
+        _cache_local.conn = conn
+    return conn
+
+def doi_cache_get(doi):
+    """
+    Consulta los metadatos de CrossRef cacheados para un DOI.
+
+    Args:
+        doi (str): DOI del artículo.
+
+    Returns:
+        dict or None: Metadatos cacheados si existen y no han caducado, de lo contrario None.
+    """
+    key = normalize_doi(doi)
+    now = time.time()
+    try:
+        conn = get_cache_connection()
+        row = conn.execute("SELECT item, fetched_at FROM doi_cache WHERE doi = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > DOI_CACHE_TTL:
+            conn.execute("DELETE FROM doi_cache WHERE doi = ?", (key,))
+            conn.commit()
+            return None
+        conn.execute("UPDATE doi_cache SET accessed_at = ? WHERE doi = ?", (now, key))
+        conn.commit()
+        return json.loads(row[0])
+    except sqlite3.Error as e:
+        log(f"⚠️ Error leyendo la caché de DOIs para {doi}: {str(e)}")
+        return None
+
+def doi_cache_put(doi, item):
+    """
+    Guarda en caché los campos relevantes de los metadatos de CrossRef de un DOI y, si se supera
+    DOI_CACHE_MAX_ENTRIES, expulsa las entradas caducadas y las menos usadas recientemente.
+    Contar la tabla entera es caro, así que el tamaño solo se comprueba cada DOI_CACHE_CHECK_EVERY
+    inserciones de cada hilo.
+
+    Args:
+        doi (str): DOI del artículo.
+        item (dict): Mensaje de CrossRef con los metadatos del artículo.
+    """
+    key = normalize_doi(doi)
+    now = time.time()
+    payload = json.dumps({k: item[k] for k in CROSSREF_FIELDS if k in item}, ensure_ascii=False)
+    try:
+        conn = get_cache_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO doi_cache (doi, item, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, payload, now, now)
+        )
+        _cache_local.doi_inserts = getattr(_cache_local, "doi_inserts", 0) + 1
+        if _cache_local.doi_inserts % DOI_CACHE_CHECK_EVERY == 0:
+            total = conn.execute("SELECT COUNT(*) FROM doi_cache").fetchone()[0]
+            if total > DOI_CACHE_MAX_ENTRIES:
+                conn.execute("DELETE FROM doi_cache WHERE fetched_at < ?", (now - DOI_CACHE_TTL,))
+                conn.execute(
+                    "DELETE FROM doi_cache WHERE doi IN (SELECT doi FROM doi_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (max(0, total - DOI_CACHE_MAX_ENTRIES),)
+                )
+        conn.commit()
+    except sqlite3.Error as e:
+        log(f"⚠️ Error escribiendo la caché de DOIs para {doi}: {str(e)}")
+
+def abstract_miss_get(doi):
+    """
+    Consulta la caché negativa de abstracts: si ya se buscó sin éxito el abstract de un DOI.
+
+    Args:
+        doi (str): DOI del artículo.
+
+    Returns:
+        dict or None: {"reason", "failures", "retry_at"} del último fallo, o None si no hay ninguno.
+    """
+    try:
+        row = get_cache_connection().execute(
+            "SELECT reason, failures, retry_at FROM abstract_miss WHERE doi = ?", (normalize_doi(doi),)
+        ).fetchone()
+    except sqlite3.Error as e:
+        log(f"⚠️ Error leyendo la caché negativa de abstracts para {doi}: {str(e)}")
+        return None
+    if row is None:
+        return None
+    return {"reason": row[0], "failures": row[1], "retry_at": row[2]}
+
+def abstract_miss_put(doi, reason, failures=1):
+    """
+    Registra que no se encontró el abstract de un DOI. No se vuelve a buscar hasta pasado
+    ABSTRACT_MISS_TTL[reason] * 2^(failures - 1) segundos (como mucho ABSTRACT_MISS_MAX_TTL).
+
+    Args:
+        doi (str): DOI del artículo.
+        reason (str): Motivo del fallo (clave de ABSTRACT_MISS_TTL).
+        failures (int): Fallos seguidos, contando este.
+    """
+    now = time.time()
+    wait = min(ABSTRACT_MISS_MAX_TTL, ABSTRACT_MISS_TTL.get(reason, ABSTRACT_MISS_TTL["error"]) * 2 ** (failures - 1))
+    try:
+        conn = get_cache_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO abstract_miss (doi, reason, failures, checked_at, retry_at) VALUES (?, ?, ?, ?, ?)",
+            (normalize_doi(doi), reason, failures, now, now + wait)
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        log(f"⚠️ Error escribiendo la caché negativa de abstracts para {doi}: {str(e)}")
+
+def abstract_miss_purge():
+    """Borra de la caché negativa los fallos que llevan más de ABSTRACT_MISS_MAX_TTL sin reintentarse (una vez por ejecución)."""
+    try:
+        conn = get_cache_connection()
+        conn.execute("DELETE FROM abstract_miss WHERE retry_at < ?", (time.time() - ABSTRACT_MISS_MAX_TTL,))
+        conn.commit()
+    except sqlite3.Error as e:
+        log(f"⚠️ Error limpiando la caché negativa de abstracts: {str(e)}")
+
+def abstract_miss_clear(doi):
+    """Borra de la caché negativa un DOI cuyo abstract ya se ha encontrado."""
+    try:
+        conn = get_cache_connection()
+        conn.execute("DELETE FROM abstract_miss WHERE doi = ?", (normalize_doi(doi),))
+        conn.commit()
+    except sqlite3.Error as e:
+        log(f"⚠️ Error escribiendo la caché negativa de abstracts para {doi}: {str(e)}")
+
+# endregion
+
+# region --- LIMITADOR DE PETICIONES POR HOST --- #
+
+class HostRateLimiter:
+    """
+    Token bucket de un host: reparte las peticiones a `rate` por segundo entre todos los hilos.
+    Respeta Retry-After, adopta el límite anunciado por CrossRef (X-Rate-Limit-Limit /
+    X-Rate-Limit-Interval) y reduce el ritmo a la mitad tras cada 429, recuperándolo
+    poco a poco con cada respuesta correcta.
+    """
+
+    def __init__(self, rate):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Reserva un turno y devuelve los segundos que hay que esperar antes de enviar la petición."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def observe(self, response):
+        """Ajusta el ritmo del host a partir del código y las cabeceras de una respuesta."""
+        headers = response.headers
+        with self.lock:
+            limit = headers.get("X-Rate-Limit-Limit")
+            interval = re.match(r"^\s*(\d+(?:\.\d+)?)\s*s?\s*$", headers.get("X-Rate-Limit-Interval") or "")
+            if limit and interval and float(interval.group(1)) > 0:
+                try:
+                    self.max_rate = RATE_LIMIT_SAFETY * float(limit) / float(interval.group(1))
+                    self.capacity = max(1.0, self.max_rate)
+                except ValueError:
+                    pass
+
+            if response.status_code == 429:
+                self.rate = max(MIN_HOST_RATE, self.rate / 2)
+                self.tokens = min(self.tokens, 0.0)
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+                self.blocked_until = time.monotonic() + (RETRY_BACKOFF if retry_after is None else retry_after)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+def parse_retry_after(value):
+    """
+    Interpreta la cabecera Retry-After, que puede venir en segundos o como fecha HTTP.
+
+    Args:
+        value (str or None): Valor de la cabecera.
+
+    Returns:
+        float or None: Segundos a esperar, o None si no hay cabecera válida.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+_rate_limiters = {}
+
+def get_rate_limiters():
+    """Devuelve el diccionario {host: HostRateLimiter} compartido por todo el proceso."""
+    return _rate_limiters
+
+_species_list_cache = {}
+
+def get_species_list_cache():
+    """Devuelve la caché {filtros: (instante, especies)} de fetch_species_list compartida por todo el proceso."""
+    return _species_list_cache
+
+_filter_df = None
+_filter_df_lock = threading.Lock()
+
+def get_filter_df():
+    """
+    Devuelve el catálogo de especies de MITECO del proceso, cargándolo en el primer uso.
+
+    Returns:
+        pd.DataFrame: Hoja de especies del Excel de MITECO.
+    """
+    global _filter_df
+    with _filter_df_lock:
+        if _filter_df is None:
+            _filter_df = load_catalog()
+    return _filter_df
+
+_filter_options = None
+_filter_options_lock = threading.Lock()
+
+def get_filter_options():
+    """
+    Devuelve los valores posibles de cada columna filtrable del catálogo, calculados en el primer uso.
+
+    Returns:
+        dict: {columna: lista ordenada de valores}.
+    """
+    global _filter_options
+    with _filter_options_lock:
+        if _filter_options is None:
+            filter_df = get_filter_df()
+            _filter_options = {
+                col: sorted(filter_df[col].dropna().unique().tolist())
+                for col in FILTER_COLUMNS if col in filter_df.columns
+            }
+    return _filter_options
+
+_species_filter_index = None
+_species_filter_index_lock = threading.Lock()
+
+def get_species_filter_index():
+    """
+    Devuelve el índice local de filtros del proceso, creándolo en el primer uso.
+
+    Returns:
+        SpeciesFilterIndex: Índice sobre el catálogo de MITECO.
+    """
+    global _species_filter_index
+    with _species_filter_index_lock:
+        if _species_filter_index is None:
+            _species_filter_index = SpeciesFilterIndex(get_filter_df())
+    return _species_filter_index
+
+def create_http_adapters():
+    """
+    Crea los adaptadores HTTP con keep-alive y un pool de conexiones por host (HTTP_POOL_SIZES).
+    requests elige el adaptador con el prefijo de URL más largo, así cada host usa su propio pool.
+
+    Returns:
+        dict: Prefijo de URL -> HTTPAdapter.
+    """
+    adapters = {
+        "http://": HTTPAdapter(pool_maxsize=DEFAULT_HTTP_POOL_SIZE),
+        "https://": HTTPAdapter(pool_maxsize=DEFAULT_HTTP_POOL_SIZE),
+    }
+    for host, pool_size in HTTP_POOL_SIZES.items():
+        adapters[f"https://{host}"] = HTTPAdapter(pool_maxsize=pool_size)
+    return adapters
+
+def create_http_session(adapters=None):
+    """
+    Crea una sesión requests con las cabeceras del proyecto y los adaptadores indicados.
+
+    Args:
+        adapters (dict, opcional): Prefijo de URL -> HTTPAdapter. Por defecto, get_http_adapters().
+
+    Returns:
+        requests.Session: Sesión configurada.
+    """
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    for prefix, adapter in (adapters or get_http_adapters()).items():
+        session.mount(prefix, adapter)
+    return session
+
+_http_adapters = None
+_http_adapters_lock = threading.Lock()
+_http_local = threading.local()  # Una sesión requests por hilo
+
+def get_http_adapters():
+    """
+    Devuelve los adaptadores HTTP del proceso, creándolos en el primer uso. Sus pools de conexiones
+    son seguros entre hilos, así que todas las sesiones los comparten.
+
+    Returns:
+        dict: Prefijo de URL -> HTTPAdapter.
+    """
+    global _http_adapters
+    with _http_adapters_lock:
+        if _http_adapters is None:
+            _http_adapters = create_http_adapters()
+    return _http_adapters
+
+def get_http_session():
+    """
+    Devuelve la sesión HTTP del hilo actual, creándola en el primer uso. requests.Session no es
+    segura entre hilos (cookies, cabeceras), así que cada hilo tiene la suya sobre los mismos
+    adaptadores y pools de conexiones (get_http_adapters).
+
+    Returns:
+        requests.Session: Sesión con pools de conexiones por host.
+    """
+    session = getattr(_http_local, "session", None)
+    if session is None:
+        session = _http_local.session = create_http_session()
+    return session
+
+def get_rate_limiter(url):
+    """
+    Devuelve el limitador del host de una URL, creándolo con HOST_RATE_LIMITS si no existe.
+
+    Args:
+        url (str): URL de la petición.
+
+    Returns:
+        HostRateLimiter: Limitador compartido por todas las peticiones a ese host.
+    """
+    host = urlparse(url).hostname or ""
+    limiters = get_rate_limiters()
+    limiter = limiters.get(host)
+    if limiter is None:
+        limiter = limiters.setdefault(host, HostRateLimiter(HOST_RATE_LIMITS.get(host, DEFAULT_HOST_RATE_LIMIT)))
+    return limiter
+
+def http_get(url, session=None, **kwargs):
+    """
+    Petición GET síncrona a través del limitador del host y de la sesión HTTP compartida. Mientras
+    dura, ocupa un hueco del semáforo de su host en el motor asíncrono (AsyncFetchEngine.host_slot),
+    así que las peticiones síncronas y las del motor a un mismo host respetan juntas HOST_CONCURRENCY.
+    Los 429 se reintentan (hasta MAX_RETRIES) esperando lo que indique el limitador.
+
+    Args:
+        url (str): URL de la petición.
+        session (requests.Session, opcional): Sesión a usar. Por defecto, get_http_session().
+        **kwargs: Argumentos adicionales para session.get.
+
+    Returns:
+        requests.Response: Última respuesta recibida.
+    """
+    session = session or get_http_session()
+    limiter = get_rate_limiter(url)
+    engine = get_fetch_engine()
+    for _ in range(MAX_RETRIES):
+        time.sleep(limiter.reserve())
+        with engine.host_slot(url):
+            response = session.get(url, **kwargs)
+        limiter.observe(response)
+        if response.status_code != 429:
+            break
+        log(f"⏳ 429 recibido de {urlparse(url).hostname}, reduciendo el ritmo de peticiones...")
+    return response
+
+# endregion
+
+# region --- MOTOR ASÍNCRONO DE PETICIONES --- #
+
+class AsyncFetchEngine:
+    """
+    Motor de peticiones asíncronas: un bucle asyncio en un hilo en segundo plano con un cliente
+    httpx compartido y un límite de peticiones simultáneas por host (HOST_CONCURRENCY).
+    Las redirecciones se siguen salto a salto, así que cada salto (p. ej. doi.org y después la web
+    de la editorial) cuenta contra el semáforo y el limitador de su propio host.
+    Las funciones síncronas del fetcher ejecutan sus corrutinas aquí mediante run(), y http_get
+    ocupa los mismos semáforos con host_slot().
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.client = None
+        self.semaphores = {}
+        self.semantic_scholar = SemanticScholarBatcher()
+        threading.Thread(target=self.loop.run_forever, name="rosalia-async-engine", daemon=True).start()
+
+    def run(self, coro):
+        """Ejecuta una corrutina en el bucle del motor y espera su resultado desde código síncrono."""
+        return self.submit(coro).result()
+
+    def submit(self, coro):
+        """Lanza una corrutina en el bucle del motor sin esperarla; devuelve un concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def semaphore(self, url):
+        """Devuelve el semáforo del host de la URL (se crea dentro del bucle del motor)."""
+        host = urlparse(url).hostname or ""
+        if host not in self.semaphores:
+            self.semaphores[host] = asyncio.Semaphore(HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY))
+        return self.semaphores[host]
+
+    async def acquire_host_slot(self, url):
+        """Espera un hueco del semáforo del host de la URL y lo ocupa (se libera con semaphore(url).release())."""
+        await self.semaphore(url).acquire()
+
+    @contextmanager
+    def host_slot(self, url):
+        """
+        Ocupa desde un hilo síncrono (nunca desde el bucle del motor) un hueco del semáforo del host
+        de la URL mientras dura el bloque with, para que las peticiones síncronas cuenten contra el
+        mismo límite HOST_CONCURRENCY que las asíncronas.
+        """
+        self.run(self.acquire_host_slot(url))
+        try:
+            yield
+        finally:
+            self.loop.call_soon_threadsafe(self.semaphore(url).release)
+
+    def get_client(self):
+        """Devuelve el cliente httpx compartido, creándolo en el primer uso (dentro del bucle del motor)."""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                follow_redirects=False,         # Las redirecciones las sigue send(), salto a salto
+                timeout=HTTP_TIMEOUT,
+                headers=HTTP_HEADERS,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=sum(HTTP_POOL_SIZES.values()) + DEFAULT_HTTP_POOL_SIZE * 4,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+        return self.client
+
+    async def get(self, url, **kwargs):
+        """Petición GET asíncrona (ver request)."""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        """Petición POST asíncrona (ver request)."""
+        return await self.request("POST", url, **kwargs)
+
+    async def request(self, method, url, **kwargs):
+        """Petición asíncrona con los límites de cada host; devuelve la respuesta final ya leída (ver send)."""
+        return await self.send(self.get_client().build_request(method, url, **kwargs))
+
+    async def stream(self, url, handle, **kwargs):
+        """
+        Petición GET en streaming con los mismos límites que get(). `handle` es una corrutina que
+        recibe la respuesta final con el cuerpo aún sin leer: puede leerlo por trozos (aiter_bytes) y
+        dejar de leer cuando quiera, lo que cierra la conexión. Se devuelve su resultado.
+        """
+        return await self.send(self.get_client().build_request("GET", url, **kwargs), handle)
+
+    async def send(self, request, handle=None):
+        """
+        Envía una petición siguiendo sus redirecciones (hasta HTTP_MAX_REDIRECTS). Cada salto espera
+        al limitador de su host y ocupa un hueco del semáforo de su host mientras se lee la respuesta,
+        y sus 429 se reintentan (hasta MAX_RETRIES); en el último intento la respuesta se entrega tal cual.
+
+        Args:
+            request (httpx.Request): Petición construida con el cliente del motor.
+            handle (coroutine function, optional): Recibe la respuesta final sin leer (ver stream).
+
+        Returns:
+            El resultado de `handle`, o la respuesta final leída si no se indica.
+        """
+        client = self.get_client()
+        for _ in range(HTTP_MAX_REDIRECTS + 1):
+            url = str(request.url)
+            limiter = get_rate_limiter(url)
+            for attempt in range(MAX_RETRIES):
+                await asyncio.sleep(limiter.reserve())
+                async with self.semaphore(url):
+                    response = await client.send(request, stream=True)
+                    try:
+                        limiter.observe(response)
+                        retry = response.status_code == 429 and attempt < MAX_RETRIES - 1
+                        if not retry and response.next_request is None:
+                            if handle is not None:
+                                return await handle(response)
+                            await response.aread()
+                            return response
+                    finally:
+                        await response.aclose()
+                if not retry:
+                    break
+                log(f"⏳ 429 recibido de {urlparse(url).hostname}, reduciendo el ritmo de peticiones...")
+            request = response.next_request
+        raise httpx.TooManyRedirects("Exceeded maximum allowed redirects.", request=request)
+
+_fetch_engine = None
+_fetch_engine_lock = threading.Lock()
+
+def get_fetch_engine():
+    """
+    Devuelve el motor asíncrono del proceso, creándolo en el primer uso.
+
+    Returns:
+        AsyncFetchEngine: Motor compartido por todos los hilos del proceso.
+    """
+    global _fetch_engine
+    with _fetch_engine_lock:
+        if _fetch_engine is None:
+            _fetch_engine = AsyncFetchEngine()
+    return _fetch_engine
 
-# Mapeo directo de nombres de filtro y DOIs
-FILTER_KEY_MAP = {key: key for key in FILTER_OPTIONS.keys()}
 # endregion
 
 # region --- FUNCIONES AUXILIARES --- #
 
-def chunk_list(lst, chunk_size):
-    """Divide una lista en sublistas de tamaño `chunk_size`."""
-    return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
+# Índice local de filtros sobre las especies del Excel de MITECO
+class SpeciesFilterIndex:
+    """
+    Índice en memoria del catálogo de MITECO para contar especies por combinaciones de filtros sin llamar
+    a IEPNB. Cada valor de una columna tiene un bitmap (un int de Python) con las filas del Excel
+    que lo tienen, así que las combinaciones AND/OR se resuelven con & y | entre bitmaps, con la
+    misma semántica por fila que los filtros de la API. Cada fila guarda el número de su especie
+    (WithoutAutorship) para contar especies distintas. Las columnas se indexan la primera vez
+    que se consultan.
+    """
+
+    def __init__(self, df):
+        self.df = df.dropna(subset=["WithoutAutorship"])
+        names = self.df["WithoutAutorship"].astype(str)
+        self.species = np.array(sorted(names.unique()), dtype=object)
+        self.row_species = pd.Categorical(names, categories=self.species).codes
+        self.columns = {}
+        self.lock = threading.Lock()
+
+    def bitmap_from_rows(self, rows):
+        """Construye el bitmap de un conjunto de posiciones de fila."""
+        bits = np.zeros(len(self.row_species), dtype=bool)
+        bits[rows] = True
+        return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+    def rows(self, bitmap):
+        """Posiciones de las filas de un bitmap."""
+        if not bitmap:
+            return np.array([], dtype=np.int64)
+        raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+
+    def column(self, key):
+        """
+        Devuelve los bitmaps {valor: bitmap} de una columna, construidos en una sola pasada con groupby.
+        Los valores se indexan con filter_value_str, igual que en los filtros "eq.".
+        """
+        with self.lock:
+            if key not in self.columns:
+                values = self.df[key]
+                present = values.notna().to_numpy()
+                positions = pd.Series(np.flatnonzero(present))
+                groups = positions.groupby(values[present].map(filter_value_str).to_numpy())
+                self.columns[key] = {value: self.bitmap_from_rows(rows.to_numpy()) for value, rows in groups}
+            return self.columns[key]
+
+    def bitmap(self, key, value):
+        """Bitmap de las filas con `key` igual a `value` (0 si no hay ninguna)."""
+        return self.column(key).get(filter_value_str(value), 0)
+
+    def count(self, bitmap):
+        """Número de especies distintas de las filas de un bitmap."""
+        return len(np.unique(self.row_species[self.rows(bitmap)]))
+
+    def species_names(self, bitmap):
+        """Nombres de las especies distintas de las filas de un bitmap, en orden alfabético."""
+        return self.species[np.unique(self.row_species[self.rows(bitmap)])].tolist()
 
 # Función para obtener el número de especies por filtro
 def n_species_by_filter(key):
     """
-    Devuelve un listado con el número de especies para cada valor único de un filtro simple.
+    Devuelve un listado con el número de especies para cada valor único de un filtro simple,
+    calculado con el índice local de filtros.
 
     Args:
         key (str): Clave del filtro.
@@ -109,26 +892,56 @@ def n_species_by_filter(key):
         list of tuples: Lista de tuplas (valor, número de especies)
     """
     results = []
-    if key in FILTER_OPTIONS:
-        for value in FILTER_OPTIONS[key]:
-            filters = {key: f"eq.{value}"}
-            species = fetch_species_list(filters=filters)
-            count = len(species)
-            results.append((value, count))
+    filter_options = get_filter_options()
+    if key in filter_options:
+        index = get_species_filter_index()
+        for value in filter_options[key]:
+            results.append((value, index.count(index.bitmap(key, value))))
     return results
 
 
 # Función para analizar combinaciones de filtros
-def n_species_in_n_filters(base_filter_key, base_filter_value, compare_filter_keys):
+def n_species_in_n_filters(base_filter_key, base_filter_value, compare_filter_keys, confirm=False):
+    """
+    Cuenta las especies de cada combinación del filtro base con un valor de cada filtro a comparar.
+    Las combinaciones se recorren en profundidad con el índice local de filtros: cada nivel hace
+    AND con el bitmap acumulado y las ramas que se quedan sin especies no se exploran.
+
+    Args:
+        base_filter_key (str): Clave del filtro base.
+        base_filter_value (str): Valor del filtro base.
+        compare_filter_keys (list of str): Claves de los filtros a combinar con el base.
+        confirm (bool): Si True, confirma cada combinación con especies contra la API de IEPNB.
+
+    Returns:
+        list of tuples: Lista de tuplas (descripción de la combinación, número de especies).
+    """
     log(f"\nAnalizando filtro compuesto '{base_filter_key}' = '{base_filter_value}'")
-    filter_combos = [FILTER_OPTIONS[key] for key in compare_filter_keys if key in FILTER_OPTIONS]
-    results = []
+    index = get_species_filter_index()
+    filter_options = get_filter_options()
+    compare_filter_keys = [key for key in compare_filter_keys if key in filter_options]
+    combos = []
+
+    def explore(level, bitmap, values):
+        if level == len(compare_filter_keys):
+            combos.append((values, bitmap))
+            return
+        key = compare_filter_keys[level]
+        for value in filter_options[key]:
+            combined = bitmap & index.bitmap(key, value)
+            if combined:
+                explore(level + 1, combined, values + [value])
+
+    explore(0, index.bitmap(base_filter_key, base_filter_value), [])
 
-    for values in product(*filter_combos):
-        filters = {base_filter_key: f"eq.{base_filter_value}"}
-        filters.update({k: f"eq.{v}" for k, v in zip(compare_filter_keys, values)})
-        species = fetch_species_list(filters=filters)
-        count = len(species)
+    results = []
+    for values, bitmap in combos:
+        count = index.count(bitmap)
+        if confirm:
+            filters = {base_filter_key: f"eq.{base_filter_value}"}
+            filters.update({k: f"eq.{v}" for k, v in zip(compare_filter_keys, values)})
+            species = fetch_species_list(filters=filters, local=False)
+            count = len({s.get("WithoutAutorship") for s in species})
         if count > 0:
             combo_desc = ", ".join(f"{k}={v}" for k, v in zip(compare_filter_keys, values))
             results.append((combo_desc, count))
@@ -142,10 +955,94 @@ def n_species_in_n_filters(base_filter_key, base_filter_value, compare_filter_ke
 
     return results
 
+def semantic_scholar_headers():
+    """Cabeceras para la API de Semantic Scholar (con la clave, si se ha configurado)."""
+    return {"x-api-key": SEMANTIC_SCHOLAR_API_KEY} if SEMANTIC_SCHOLAR_API_KEY else {}
+
+class SemanticScholarBatcher:
+    """
+    Agrupa las búsquedas de abstracts por DOI de todo el proceso en peticiones a /paper/batch de
+    Semantic Scholar (hasta SEMANTIC_SCHOLAR_BATCH_SIZE DOIs cada una). Cada DOI pedido espera en
+    un future; el lote se envía al llenarse o SEMANTIC_SCHOLAR_BATCH_WAIT segundos después del
+    primer DOI. Vive en el bucle del motor asíncrono, así que no necesita bloqueos.
+    """
+
+    def __init__(self):
+        self.pending = {}  # {DOI normalizado: [futures que esperan su abstract]}
+        self.flush_handle = None
+        self.tasks = set()  # Lotes en curso (asyncio solo guarda referencias débiles a las tareas)
+
+    async def lookup(self, doi):
+        """
+        Busca el abstract de un DOI en el siguiente lote.
+
+        Args:
+            doi (str): DOI del artículo.
+
+        Returns:
+            str or None: El abstract si Semantic Scholar lo tiene, de lo contrario None.
+
+        Raises:
+            Exception: El error del lote si Semantic Scholar no lo respondió (no significa que no tenga el abstract).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.setdefault(normalize_doi(doi), []).append(future)
+        if len(self.pending) >= SEMANTIC_SCHOLAR_BATCH_SIZE:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(SEMANTIC_SCHOLAR_BATCH_WAIT, self.flush)
+        return await future
+
+    def flush(self):
+        """Envía los DOIs pendientes como un lote."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, {}
+        if batch:
+            task = asyncio.ensure_future(self.resolve(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def resolve(self, batch):
+        """
+        Pide un lote a /paper/batch y entrega a cada future su abstract (o None). Si el lote falla
+        (error de red o respuesta distinta de 200), cada future recibe la excepción.
+        """
+        abstracts, error = {}, None
+        try:
+            response = await get_fetch_engine().post(
+                f"{SEMANTIC_SCHOLAR_API}/paper/batch",
+                params={"fields": "abstract"},
+                json={"ids": [f"DOI:{doi}" for doi in batch]},
+                headers=semantic_scholar_headers()
+            )
+            response.raise_for_status()
+            # La respuesta va en el mismo orden que los ids, con null para los que no encuentra
+            for doi, paper in zip(batch, response.json()):
+                if paper and paper.get("abstract"):
+                    abstracts[doi] = paper["abstract"]
+            log(f"Semantic Scholar: {len(abstracts)} abstracts de {len(batch)} DOIs en un lote.")
+        except Exception as e:
+            log(f"⚠️ Error al consultar un lote de {len(batch)} DOIs en Semantic Scholar: {str(e)}")
+            error = e
+
+        for doi, futures in batch.items():
+            for future in futures:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(abstracts.get(doi))
+
 # Función para obtener el abstract de un artículo utilizando la API de Semantic Scholar
-def fetch_abstract_from_semantic_scholar(doi, title):
+async def fetch_abstract_from_semantic_scholar_async(doi, title):
     """
     Intenta obtener el abstract de un artículo utilizando la API de Semantic Scholar.
+    Con DOI la consulta se agrupa con las del resto del proceso (SemanticScholarBatcher);
+    sin DOI se busca por título.
 
     Args:
         doi (str): DOI del artículo.
@@ -154,25 +1051,65 @@ def fetch_abstract_from_semantic_scholar(doi, title):
     Returns:
         str or None: El abstract si se encuentra, de lo contrario None.
     """
-    api_url = "https://api.semanticscholar.org/graph/v1/paper/search?query="
+    return (await lookup_abstract_from_semantic_scholar_async(doi, title))[0] or None
 
-    if doi:
-        query = f"DOI:{doi}"
-    elif title:
-        query = title
-    else:
-        return None
+async def lookup_abstract_from_semantic_scholar_async(doi, title):
+    """
+    Como fetch_abstract_from_semantic_scholar_async, pero indica también por qué no se encontró
+    el abstract, para la caché negativa de abstracts.
 
-    response = requests.get(f"{api_url}{query}&fields=abstract")
-    if response.status_code == 200:
+    Args:
+        doi (str): DOI del artículo.
+        title (str): Título del artículo.
+
+    Returns:
+        tuple: (abstract, motivo). El motivo es None si se encontró, "no_abstract" si Semantic Scholar
+            respondió sin abstract y, si la consulta falló, "timeout" o "error".
+    """
+    if not doi and not title:
+        return "", "no_abstract"
+    query = doi or title
+    try:
+        if doi:
+            abstract = await get_fetch_engine().semantic_scholar.lookup(doi)
+            return abstract or "", None if abstract else "no_abstract"
+
+        response = await get_fetch_engine().get(
+            f"{SEMANTIC_SCHOLAR_API}/paper/search", params={"query": query, "fields": "abstract"}, headers=semantic_scholar_headers()
+        )
+        response.raise_for_status()
         data = response.json().get("data", [])
-        if data and "abstract" in data[0]:
-            return data[0]["abstract"]
+        if data and data[0].get("abstract"):
+            return data[0]["abstract"], None
+        return "", "no_abstract"
+    except Exception as e:
+        if not doi:
+            log(f"⚠️ Error al consultar Semantic Scholar para {query}: {str(e)}")
+        return "", "timeout" if isinstance(e, httpx.TimeoutException) else "error"
 
-    return None
+def fetch_abstract_from_semantic_scholar(doi, title):
+    """Envoltorio síncrono de fetch_abstract_from_semantic_scholar_async."""
+    return get_fetch_engine().run(fetch_abstract_from_semantic_scholar_async(doi, title))
+
+def is_complete_crossref_item(item):
+    """
+    Indica si un registro devuelto por la búsqueda de CrossRef trae los metadatos necesarios para
+    construir el artículo (título, URL y alguna fecha) sin pedir su DOI. El abstract no cuenta:
+    si falta en la búsqueda, tampoco lo trae la consulta por DOI.
+
+    Args:
+        item (dict): Registro de CrossRef.
+
+    Returns:
+        bool: True si el registro está completo.
+    """
+    return bool(
+        item.get("title") and item.get("URL")
+        and any(item.get(field) for field in ["published-online", "published-print", "issued"])
+    )
 
 # Función para obtener los metadatos de un artículo utilizando su DOI
-def fetch_article_by_doi(doi, species_name, use_web_abstract=True):
+async def fetch_article_by_doi_async(doi, species_name, use_web_abstract=True, item=None):
     """
     Obtiene los metadatos de un artículo utilizando su DOI desde la API de CrossRef.
 
@@ -180,6 +1117,8 @@ def fetch_article_by_doi(doi, species_name, use_web_abstract=True):
         doi (str): Identificador DOI del artículo.
         species_name (str): Nombre de la especie científica asociada al artículo.
         use_web_abstract (bool): Indica si debe intentar obtener el abstract desde la web del artículo si no está presente.
+        item (dict, opcional): Registro ya recibido en la búsqueda de CrossRef. Si está completo
+            (ver is_complete_crossref_item) se usa directamente y no se pide el DOI.
 
     Returns:
         dict or None: Un diccionario con los metadatos del artículo si se recupera correctamente, de lo contrario None.
@@ -187,41 +1126,56 @@ def fetch_article_by_doi(doi, species_name, use_web_abstract=True):
     url = f"{CROSSREF_API}/{doi}"
     retries = 0
 
-    while retries < MAX_RETRIES:
+    # SQLite bloquea (la caché se comparte con el reporter): se usa fuera del bucle del motor
+    if item is not None and is_complete_crossref_item(item):
+        await asyncio.to_thread(doi_cache_put, doi, item)
+    else:
+        # La caché persistente se consulta antes de cualquier llamada a la red
+        item = await asyncio.to_thread(doi_cache_get, doi)
+
+    while item is None and retries < MAX_RETRIES:
         try:
-            response = requests.get(url)
+            response = await get_fetch_engine().get(url)
             if response.status_code == 200:
                 item = response.json().get("message", {})
-                abstract = item.get("abstract", "")
-
-                # Solo intentamos obtener abstract de la web si se permite
-                if not abstract and item.get("URL") and use_web_abstract:
-                    abstract = fetch_abstract_from_web(item.get("URL"))
-
-                return {
-                    "scientific name": species_name,
-                    "title": item.get("title", [""])[0],
-                    "year": extract_year(item),
-                    "authors": format_authors(item.get("author", [])),
-                    "abstract": abstract,
-                    "url": item.get("URL", ""),
-                    "DOI": doi
-                }
+                await asyncio.to_thread(doi_cache_put, doi, item)
 
             elif response.status_code == 429:
-                time.sleep(RETRY_BACKOFF)
-                retries += 1
+                # El motor ya ha reintentado los 429 hasta MAX_RETRIES: no se vuelve a empezar
+                log(f"⚠️ CrossRef sigue respondiendo 429 para el DOI {doi}, se descarta")
+                break
             else:
                 retries += 1
-                time.sleep(DELAY_BETWEEN_REQUESTS)
+                await asyncio.sleep(DELAY_BETWEEN_REQUESTS)
         except Exception as e:
             log(f"⚠️ Error al obtener metadatos por DOI {doi}: {str(e)}")
             retries += 1
 
-    return None
+    if item is None:
+        return None
+
+    abstract = item.get("abstract", "")
+
+    # Solo intentamos obtener abstract de la web si se permite
+    if not abstract and item.get("URL") and use_web_abstract:
+        abstract = await fetch_abstract_from_web_async(item.get("URL"))
+
+    return {
+        "scientific name": species_name,
+        "title": item.get("title", [""])[0],
+        "year": extract_year(item),
+        "authors": format_authors(item.get("author", [])),
+        "abstract": abstract,
+        "url": item.get("URL", ""),
+        "DOI": doi
+    }
+
+def fetch_article_by_doi(doi, species_name, use_web_abstract=True):
+    """Envoltorio síncrono de fetch_article_by_doi_async."""
+    return get_fetch_engine().run(fetch_article_by_doi_async(doi, species_name, use_web_abstract))
 
 # Función para obtener el abstract desde la web del artículo
-def fetch_abstract_from_web(url):
+async def fetch_abstract_from_web_async(url):
     """
     Intenta obtener el abstract de un artículo directamente desde su página web.
 
@@ -231,57 +1185,313 @@ def fetch_abstract_from_web(url):
     Returns:
         str: El texto del abstract si se encuentra, de lo contrario una cadena vacía.
     """
+    return (await lookup_abstract_from_web_async(url))[0]
+
+async def lookup_abstract_from_web_async(url):
+    """
+    Como fetch_abstract_from_web_async, pero indica también por qué no se encontró el abstract,
+    para la caché negativa de abstracts.
+
+    Args:
+        url (str): URL del artículo.
+
+    Returns:
+        tuple: (abstract, motivo). El motivo es None si se encontró y, si no, una clave de ABSTRACT_MISS_TTL.
+    """
     try:
-        response = requests.get(url, timeout=120, allow_redirects=True)
-        response.raise_for_status()
-        final_url = response.url  # URL final después de redirecciones
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # Verificar si es un artículo de ScienceDirect
-        if "sciencedirect.com" in final_url:
-            abstract_section = soup.find("div", class_="abstract author")
-            if abstract_section:
-                abstract_text = abstract_section.get_text(strip=True, separator=" ")
-                if abstract_text:
-                    log(f"✅ Abstract obtenido desde ScienceDirect para: {final_url}")
-                    return abstract_text
-
-        # Verificar si es un artículo de TandFOnline
-        if "tandfonline.com" in final_url:
-            scripts = soup.find_all('script', type='application/ld+json')
-            for script in scripts:
-                try:
-                    data = json.loads(script.string)
-                    if isinstance(data, list):
-                        for entry in data:
-                            if entry.get("@type") == "ScholarlyArticle" and "abstract" in entry:
-                                abstract_text = entry["abstract"].strip()
-                                log(f"✅ Abstract obtenido desde TandFOnline para: {final_url}")
-                                return abstract_text
-                except json.JSONDecodeError:
-                    continue
+        extractor = await get_fetch_engine().stream(url, read_abstract_from_response, timeout=120)
+        # El parseo final es CPU: se hace fuera del bucle y ya sin ocupar el hueco del host ni la conexión
+        abstract = await asyncio.to_thread(extractor.finish) if extractor is not None else ""
+        return abstract, None if abstract else "no_abstract"
+    except Exception as e:
+        log(f"⚠️ No se pudo obtener el abstract de {url}: {str(e)}")
+        return "", abstract_miss_reason(e)
+
+def abstract_miss_reason(error):
+    """
+    Clasifica el error al descargar la web de un artículo en un motivo de ABSTRACT_MISS_TTL.
+
+    Args:
+        error (Exception): Excepción capturada.
+
+    Returns:
+        str: "not_found", "paywall", "timeout" o "error".
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status in (404, 410):
+            return "not_found"
+        if status in (401, 402, 403):
+            return "paywall"
+        return "error"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    return "error"
+
+async def read_abstract_from_response(response):
+    """
+    Lee en streaming la web de un artículo y busca el abstract mientras llega.
+
+    Flujo:
+        - Solo se leen los tipos de contenido de WEB_ABSTRACT_CONTENT_TYPES (p. ej. no los PDFs).
+        - El cuerpo se lee por trozos, como mucho WEB_ABSTRACT_MAX_BYTES, y cada trozo pasa al extractor.
+        - Si el extractor ya tiene el abstract (etiquetas <meta> de la cabecera) se deja de leer.
+        - El extractor se devuelve sin terminar: quien llama ejecuta finish() (extract_abstract_from_html
+          sobre lo descargado) después de soltar la conexión y el hueco del host.
+
+    Args:
+        response (httpx.Response): Respuesta en streaming (ver AsyncFetchEngine.stream).
+
+    Returns:
+        StreamingAbstractExtractor or None: Extractor con lo descargado, o None si la web no es HTML.
+    """
+    response.raise_for_status()
+    final_url = str(response.url)  # URL final después de redirecciones
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in WEB_ABSTRACT_CONTENT_TYPES:
+        log(f"⚠️ La web de {final_url} no es HTML ({content_type}), no se busca el abstract.")
+        return None
+
+    extractor = StreamingAbstractExtractor(final_url)
+    async for chunk in response.aiter_bytes():
+        # feed() solo acumula y, una vez, lee las <meta> de la cabecera: es barato y va en el propio bucle
+        if extractor.feed(chunk):
+            break
+        if len(extractor.content) >= WEB_ABSTRACT_MAX_BYTES:
+            log(f"⚠️ La web de {final_url} supera {WEB_ABSTRACT_MAX_BYTES} bytes, se busca el abstract en lo descargado.")
+            break
+    return extractor
+
+def fetch_abstract_from_web(url):
+    """Envoltorio síncrono de fetch_abstract_from_web_async."""
+    return get_fetch_engine().run(fetch_abstract_from_web_async(url))
 
-        # Procedimiento general para otros sitios
-        abstract_keywords = ["abstract", "resumen", "summary"]
-        possible_titles = soup.find_all(['h2', 'h3', 'strong', 'span', 'div'], string=True)
-
-        for title in possible_titles:
-            text_title = title.get_text(strip=True).lower()
-            if any(keyword in text_title for keyword in abstract_keywords):
-                next_elem = title.find_next_sibling()
-                if next_elem and 50 < len(next_elem.get_text(strip=True)) < 2000:
-                    log(f"✅ Abstract obtenido desde la web para: {final_url}")
-                    return next_elem.get_text(strip=True)
-
-        possible_abstracts = soup.find_all(['p', 'div'], string=True)
-        for elem in possible_abstracts:
-            text = elem.get_text(strip=True)
-            if any(keyword in text.lower() for keyword in abstract_keywords) or (50 < len(text) < 2000):
-                log(f"✅ Abstract obtenido desde la web para: {final_url}")
+_html_parser = None
+
+# Elegir (una vez por proceso) el parser HTML de BeautifulSoup
+def get_html_parser():
+    """
+    Devuelve el parser HTML para BeautifulSoup: lxml (en C, mucho más rápido) si está instalado,
+    si no html.parser.
+    """
+    global _html_parser
+    if _html_parser is None:
+        try:
+            import lxml  # noqa: F401
+            _html_parser = "lxml"
+        except ImportError:
+            log("⚠️ lxml no está instalado, se usa html.parser para leer las webs de los artículos.")
+            _html_parser = "html.parser"
+    return _html_parser
+
+def element_text(elem):
+    """Texto de un elemento HTML, o cadena vacía si no existe."""
+    return elem.get_text(strip=True, separator=" ") if elem else ""
+
+def css_abstract_extractor(*selectors):
+    """
+    Crea un extractor de abstracts que devuelve el texto del primer selector CSS con contenido.
+
+    Args:
+        *selectors (str): Selectores CSS, en orden de preferencia.
+
+    Returns:
+        function: Extractor soup -> str.
+    """
+    def extract(soup):
+        for selector in selectors:
+            text = element_text(soup.select_one(selector))
+            if text:
                 return text
+        return ""
+    return extract
+
+def extract_tandfonline_abstract(soup):
+    """Abstract de TandFOnline: JSON-LD ScholarlyArticle o, si no, la sección de abstract."""
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or "")
+        except json.JSONDecodeError:
+            continue
+        for entry in (data if isinstance(data, list) else [data]):
+            if isinstance(entry, dict) and entry.get("@type") == "ScholarlyArticle" and entry.get("abstract"):
+                return entry["abstract"].strip()
+    return element_text(soup.select_one("div.abstractSection"))
+
+# Extractores específicos por editorial, por sufijo del host final (después de redirecciones)
+ABSTRACT_EXTRACTORS = {
+    "sciencedirect.com": css_abstract_extractor("div.abstract.author", "div#abstracts div.abstract"),
+    "tandfonline.com": extract_tandfonline_abstract,
+    "onlinelibrary.wiley.com": css_abstract_extractor(
+        "section.article-section__abstract div.article-section__content", "div.abstract-group section"
+    ),
+    "link.springer.com": css_abstract_extractor("div#Abs1-content", "section[data-title='Abstract'] div.c-article-section__content"),
+    "nature.com": css_abstract_extractor("div#Abs1-content", "section[data-title='Abstract'] div.c-article-section__content"),
+    "mdpi.com": css_abstract_extractor("section.html-abstract div.html-p", "div.art-abstract"),
+    "journals.plos.org": css_abstract_extractor("div.abstract-content", "div.abstract"),
+}
+
+# Metadatos <meta> con el abstract completo o un resumen, en orden de preferencia
+ABSTRACT_META_NAMES = ["citation_abstract", "dc.description", "og:description"]
+ABSTRACT_MIN_LENGTH = 50  # Un texto más corto no se considera abstract
+# og:description suele ser un avance recortado del abstract: solo se acepta si acaba como una frase completa
+TRUNCATED_SUMMARY_RE = re.compile(r'(\.\.\.|…|\[\.\.\.\]|\[…\])\s*$|[^.!?)\]"”»]\s*$')
+HTML_HEAD_END_RE = re.compile(rb'</head\s*>', re.IGNORECASE)
+
+def get_abstract_extractor(host):
+    """
+    Busca el extractor de ABSTRACT_EXTRACTORS para un host (coincidencia exacta o por subdominio).
+
+    Args:
+        host (str): Host final de la página.
+
+    Returns:
+        function or None: Extractor soup -> str, o None si la editorial no tiene uno propio.
+    """
+    host = (host or "").lower()
+    for suffix, extractor in ABSTRACT_EXTRACTORS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return extractor
+    return None
+
+def extract_abstract_from_meta(content):
+    """
+    Busca el abstract en las etiquetas <meta> de la cabecera (citation_abstract, dc.description,
+    og:description). Solo se parsea hasta </head> y solo las etiquetas <meta>. og:description
+    se descarta si parece recortado (TRUNCATED_SUMMARY_RE).
+
+    Args:
+        content (bytes): Contenido HTML de la página (basta con el principio).
+
+    Returns:
+        str: El abstract si alguna etiqueta lo trae completo, de lo contrario una cadena vacía.
+    """
+    head_end = HTML_HEAD_END_RE.search(content)
+    head = content[:head_end.start()] if head_end else content
+    metas = BeautifulSoup(head, get_html_parser(), parse_only=SoupStrainer("meta"))
+    values = {}
+    for meta in metas.find_all("meta"):
+        name = (meta.get("name") or meta.get("property") or "").lower()
+        if name in ABSTRACT_META_NAMES and name not in values and meta.get("content"):
+            values[name] = " ".join(meta["content"].split())
+    for name in ABSTRACT_META_NAMES:
+        text = values.get(name, "")
+        if name == "og:description" and TRUNCATED_SUMMARY_RE.search(text):
+            continue
+        if len(text) > ABSTRACT_MIN_LENGTH:
+            return text
+    return ""
+
+def extract_generic_abstract(soup):
+    """
+    Procedimiento general: un título "abstract"/"resumen"/"summary" seguido del texto, o el primer
+    párrafo con longitud de abstract.
+
+    Args:
+        soup (BeautifulSoup): Página completa.
+
+    Returns:
+        str: El texto del abstract si se encuentra, de lo contrario una cadena vacía.
+    """
+    abstract_keywords = ["abstract", "resumen", "summary"]
+    possible_titles = soup.find_all(['h2', 'h3', 'strong', 'span', 'div'], string=True)
+
+    for title in possible_titles:
+        text_title = title.get_text(strip=True).lower()
+        if any(keyword in text_title for keyword in abstract_keywords):
+            next_elem = title.find_next_sibling()
+            if next_elem and ABSTRACT_MIN_LENGTH < len(next_elem.get_text(strip=True)) < 2000:
+                return next_elem.get_text(strip=True)
+
+    possible_abstracts = soup.find_all(['p', 'div'], string=True)
+    for elem in possible_abstracts:
+        text = elem.get_text(strip=True)
+        if any(keyword in text.lower() for keyword in abstract_keywords) or (ABSTRACT_MIN_LENGTH < len(text) < 2000):
+            return text
+    return ""
+
+class StreamingAbstractExtractor:
+    """
+    Recibe por trozos la web de un artículo y busca el abstract en cuanto es posible: cuando llega
+    el final de la cabecera (</head>) prueba las etiquetas <meta>, y si lo traen ya no hace falta
+    seguir descargando. Las editoriales con extractor propio (ABSTRACT_EXTRACTORS) necesitan el
+    cuerpo de la página, así que con ellas se espera a tenerla completa.
+    """
+
+    def __init__(self, final_url):
+        self.final_url = final_url
+        self.content = bytearray()
+        self.abstract = ""
+        self.head_pending = get_abstract_extractor(urlparse(final_url).hostname) is None
+
+    def feed(self, chunk):
+        """
+        Añade un trozo de la página.
+
+        Returns:
+            bool: True si ya se tiene el abstract y se puede dejar de leer.
+        """
+        start = max(0, len(self.content) - 16)  # </head> puede quedar partido entre dos trozos
+        self.content += chunk
+        if self.head_pending and HTML_HEAD_END_RE.search(self.content, start):
+            self.head_pending = False
+            self.abstract = extract_abstract_from_meta(bytes(self.content))
+        return bool(self.abstract)
+
+    def finish(self):
+        """
+        Devuelve el abstract con lo descargado (hasta WEB_ABSTRACT_MAX_BYTES).
+
+        Returns:
+            str: El texto del abstract si se encuentra, de lo contrario una cadena vacía.
+        """
+        if self.abstract:
+            log(f"✅ Abstract obtenido de los metadatos de la web para: {self.final_url}")
+            return self.abstract
+        return extract_abstract_from_html(bytes(self.content[:WEB_ABSTRACT_MAX_BYTES]), self.final_url)
+
+# Función para extraer el abstract del HTML de la web del artículo
+def extract_abstract_from_html(content, final_url):
+    """
+    Busca el abstract en el HTML descargado de la web de un artículo.
+
+    Flujo:
+        - Si la editorial del host final tiene extractor propio (ABSTRACT_EXTRACTORS), se usa primero.
+        - Después, las etiquetas <meta> de la cabecera, sin parsear el resto de la página.
+        - Por último, el procedimiento general sobre la página completa.
+
+    Args:
+        content (bytes): Contenido HTML de la página.
+        final_url (str): URL final de la página, después de redirecciones.
+
+    Returns:
+        str: El texto del abstract si se encuentra, de lo contrario una cadena vacía.
+    """
+    try:
+        host = urlparse(final_url).hostname or ""
+        extractor = get_abstract_extractor(host)
+        soup = None
+        if extractor is not None:
+            soup = BeautifulSoup(content, get_html_parser())
+            abstract_text = extractor(soup)
+            if abstract_text:
+                log(f"✅ Abstract obtenido desde {host} para: {final_url}")
+                return abstract_text
+
+        abstract_text = extract_abstract_from_meta(content)
+        if abstract_text:
+            log(f"✅ Abstract obtenido de los metadatos de la web para: {final_url}")
+            return abstract_text
+
+        if soup is None:
+            soup = BeautifulSoup(content, get_html_parser())
+        abstract_text = extract_generic_abstract(soup)
+        if abstract_text:
+            log(f"✅ Abstract obtenido desde la web para: {final_url}")
+            return abstract_text
 
     except Exception as e:
-        log(f"⚠️ No se pudo obtener el abstract de {url}: {str(e)}")
+        log(f"⚠️ No se pudo procesar el HTML de {final_url}: {str(e)}")
 
     return ""
 
@@ -354,10 +1564,47 @@ def format_authors(authors_list):
 
 # Detectar idioma
 def detect_language(text):
+    return detect_language_with_confidence(text)[0]
+
+_langid_identifier = None
+
+# Cargar (una vez por proceso) el identificador de py3langid
+def get_langid_identifier():
+    """
+    Devuelve el identificador de idioma de py3langid con probabilidades normalizadas.
+    Si py3langid no está instalado devuelve None y se usa langdetect.
+    """
+    global _langid_identifier
+    if _langid_identifier is None:
+        try:
+            from py3langid.langid import LanguageIdentifier, MODEL_FILE
+            _langid_identifier = LanguageIdentifier.from_model_file(MODEL_FILE, norm_probs=True)
+        except ImportError:
+            log("⚠️ py3langid no está instalado, se usa langdetect para detectar el idioma.")
+            _langid_identifier = False
+    return _langid_identifier or None
+
+# Detectar idioma con la probabilidad del idioma más probable
+def detect_language_with_confidence(text):
+    """
+    Detecta el idioma de un texto con el detector configurado en LANG_BACKEND.
+
+    Args:
+        text (str): Texto a analizar.
+
+    Returns:
+        tuple: (código de idioma o "unknown", probabilidad del idioma detectado).
+    """
+    if LANG_BACKEND == "langid":
+        identifier = get_langid_identifier()
+        if identifier is not None:
+            lang, prob = identifier.classify(text)
+            return lang, float(prob)
     try:
-        return detect(text)
+        best = detect_langs(text)[0]
+        return best.lang, best.prob
     except:
-        return "unknown"
+        return "unknown", 0.0
 
 def extract_english_block(text, min_non_en_block=30):
     # Divide el texto en frases o párrafos
@@ -367,10 +1614,7 @@ def extract_english_block(text, min_non_en_block=30):
         block = block.strip()
         if len(block) == 0:
             continue
-        try:
-            lang = detect(block)
-        except:
-            lang = "unknown"
+        lang = detect_language(block)
         # Si el bloque es inglés, lo guardamos
         if lang == "en":
             english_blocks.append(block)
@@ -385,6 +1629,154 @@ def extract_english_block(text, min_non_en_block=30):
 
 # endregion
 
+# region --- CHECKPOINTS DE EJECUCIÓN --- #
+
+def get_checkpoint_dir(filters):
+    """
+    Devuelve la carpeta de checkpoint de una ejecución. Cada combinación de filtros tiene la suya,
+    para no mezclar especies de ejecuciones distintas.
+
+    Args:
+        filters (dict): Filtros usados en update_species_articles.
+
+    Returns:
+        str: Ruta de la carpeta de checkpoint.
+    """
+    filters_key = json.dumps(filters, sort_keys=True, default=str, ensure_ascii=False)
+    return os.path.join(CHECKPOINT_DIR, hashlib.sha1(filters_key.encode("utf-8")).hexdigest()[:12])
+
+def species_checkpoint_file(checkpoint_dir, species_name):
+    """Devuelve la ruta del JSONL de artículos de una especie dentro del checkpoint."""
+    safe_name = re.sub(r'[^\w.-]+', '_', species_name).strip("_")
+    suffix = hashlib.sha1(species_name.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(checkpoint_dir, "articles", f"{safe_name}_{suffix}.jsonl")
+
+def load_checkpoint(checkpoint_dir):
+    """
+    Lee el manifiesto del checkpoint.
+
+    Args:
+        checkpoint_dir (str): Carpeta de checkpoint.
+
+    Returns:
+        set: Especies completadas.
+    """
+    resumed_species = set()
+    manifest_path = os.path.join(checkpoint_dir, "manifest.jsonl")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Última línea truncada por una caída
+                resumed_species.update(record.get("species", []))
+    return resumed_species
+
+def save_checkpoint(checkpoint_dir, genus, species_articles):
+    """
+    Guarda en disco los artículos de las especies de un género y los registra en el manifiesto.
+    El manifiesto se escribe al final: una especie solo cuenta como completada si sus artículos ya están en disco.
+
+    Args:
+        checkpoint_dir (str): Carpeta de checkpoint.
+        genus (str): Género procesado.
+        species_articles (dict): Diccionario {especie: lista de artículos} producido por run_genus_pipeline.
+    """
+    os.makedirs(os.path.join(checkpoint_dir, "articles"), exist_ok=True)
+    for species_name, articles in species_articles.items():
+        path = species_checkpoint_file(checkpoint_dir, species_name)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            for article in articles:
+                f.write(json.dumps(article, ensure_ascii=False) + "\n")
+        os.replace(path + ".tmp", path)
+
+    record = {
+        "genus": genus,
+        "species": list(species_articles),
+        "completed_at": datetime.now().isoformat(timespec="seconds")
+    }
+    with open(os.path.join(checkpoint_dir, "manifest.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def get_species_refresh_dates(species_names):
+    """
+    Consulta la fecha de índice de CrossRef hasta la que se actualizó cada especie en la última
+    ejecución completada. Se guarda por especie y no por género: una especie nueva de un género
+    ya actualizado no tiene fecha y necesita los artículos anteriores.
+
+    Args:
+        species_names (iterable of str): Especies a consultar.
+
+    Returns:
+        dict: {especie: fecha "YYYY-MM-DD"} de las especies actualizadas alguna vez.
+    """
+    dates = {}
+    species_names = list(species_names)
+    conn = get_cache_connection()
+    # SQLite limita el número de parámetros por consulta
+    for i in range(0, len(species_names), 500):
+        chunk = species_names[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        dates.update(conn.execute(f"SELECT species, index_date FROM species_refresh WHERE species IN ({placeholders})", chunk).fetchall())
+    return dates
+
+def get_genus_from_index_date(species_names, refresh_dates):
+    """
+    Fecha desde la que hay que buscar los artículos de un género: la más antigua de sus especies,
+    o None (búsqueda completa) si alguna no se ha actualizado nunca.
+
+    Args:
+        species_names (list of str): Especies del género en esta ejecución.
+        refresh_dates (dict): {especie: fecha} devuelto por get_species_refresh_dates.
+
+    Returns:
+        str or None: Fecha "YYYY-MM-DD" o None.
+    """
+    dates = [refresh_dates.get(name) for name in species_names]
+    if not dates or None in dates:
+        return None
+    return min(dates)
+
+def set_species_refresh_dates(species_names, index_date):
+    """
+    Registra que unas especies están actualizadas hasta una fecha de índice de CrossRef.
+
+    Args:
+        species_names (iterable of str): Especies procesadas.
+        index_date (str): Fecha "YYYY-MM-DD" usada como until-index-date en la búsqueda.
+    """
+    now = time.time()
+    conn = get_cache_connection()
+    conn.executemany(
+        "INSERT OR REPLACE INTO species_refresh (species, index_date, updated_at) VALUES (?, ?, ?)",
+        [(name, index_date, now) for name in species_names]
+    )
+    conn.commit()
+
+def load_checkpoint_articles(checkpoint_dir, species_names):
+    """
+    Recupera del checkpoint los artículos de las especies indicadas.
+
+    Args:
+        checkpoint_dir (str): Carpeta de checkpoint.
+        species_names (iterable of str): Especies completadas.
+
+    Returns:
+        list: Artículos guardados de esas especies.
+    """
+    articles = []
+    for species_name in species_names:
+        path = species_checkpoint_file(checkpoint_dir, species_name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                articles.extend(json.loads(line) for line in f if line.strip())
+    return articles
+
+# endregion
+
 # region --- FUNCIONES PRINCIPALES --- #
 
 # Función para imprimir ayuda de filtros
@@ -414,7 +1806,7 @@ def help_filters(key=None, value=None, num_filters=1):
     # Caso 1: sin argumentos → mostrar claves
     if key is None:
         log("🔑 Claves de filtro disponibles:")
-        for k in FILTER_OPTIONS:
+        for k in get_filter_options():
             log(f"- {k}")
         return
 
@@ -435,7 +1827,7 @@ def help_filters(key=None, value=None, num_filters=1):
         return
 
     # Caso 3: filtro simple, mostrar valores y número de especies
-    if isinstance(key, str) and key in FILTER_OPTIONS:
+    if isinstance(key, str) and key in get_filter_options():
         if value is None:
             log(f"\n🎯 Valores posibles para '{key}' con número de especies:")
             values_with_counts = n_species_by_filter(key)
@@ -449,8 +1841,78 @@ def help_filters(key=None, value=None, num_filters=1):
 
     log("⚠️ Clave(s) de filtro no válida(s). Usa help_filters() para ver las disponibles.")
 
+# Función para pedir una página de especies a IEPNB
+def fetch_species_page(offset, limit, filters=None, session=None):
+    """
+    Pide a la API de IEPNB una página de especies.
+
+    Args:
+        offset (int): Desplazamiento de la página.
+        limit (int): Tamaño de la página.
+        filters (dict, opcional): Filtros de la API (ver fetch_species_list).
+        session (requests.Session, opcional): Sesión HTTP a usar. Por defecto, la sesión compartida.
+
+    Returns:
+        list or None: Especies de la página, o None si la API responde con error.
+    """
+    params = {"limit": limit, "offset": offset}
+    if filters:
+        filter_key_map = get_filter_key_map()
+        for k, v in filters.items():
+            actual_key = filter_key_map.get(k, k)
+            params[actual_key] = v
+    response = http_get(IEPNB_API, session=session, params=params)
+    log("URL de la petición: " + response.url)
+    if response.status_code != 200:
+        log(f"Error en la descarga: {response.status_code}")
+        return None
+    return response.json()
+
+def filter_value_str(value):
+    """
+    Representa un valor del Excel o de un filtro "eq." de forma comparable: los números enteros
+    pierden el ".0", tanto los años leídos como float como los escritos así en el filtro ("2011.0").
+    """
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return str(int(number)) if number.is_integer() else value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def local_species_list(filters):
+    """
+    Resuelve los filtros con el catálogo local de MITECO (get_filter_df) cuando es posible:
+    igualdades "eq.valor" y listas de valores sobre columnas del Excel.
+
+    Args:
+        filters (dict or None): Filtros de fetch_species_list.
+
+    Returns:
+        list or None: Filas del Excel que cumplen los filtros (como dicts), o None si algún filtro necesita la API.
+    """
+    filter_df = get_filter_df()
+    filter_key_map = get_filter_key_map()
+    mask = pd.Series(True, index=filter_df.index)
+    for key, value in (filters or {}).items():
+        column = filter_key_map.get(key, key)
+        if column not in filter_df.columns:
+            return None
+        column_values = filter_df[column].map(filter_value_str)
+        if isinstance(value, str) and value.startswith("eq."):
+            mask &= column_values == filter_value_str(value[3:])
+        elif isinstance(value, (list, tuple, set)):
+            mask &= column_values.isin([filter_value_str(v) for v in value])
+        else:
+            return None
+    rows = filter_df[mask]
+    return rows.astype(object).where(rows.notna(), None).to_dict("records")
+
 # Función para establecer la lista de especies filtradas
-def fetch_species_list(limit=1000, offset=0, filters=None):
+def fetch_species_list(limit=1000, offset=0, filters=None, session=None, local=SPECIES_LIST_LOCAL):
     """
     Obtiene una lista de especies desde la API de IEPNB, aplicando filtros opcionales.
 
@@ -458,130 +1920,587 @@ def fetch_species_list(limit=1000, offset=0, filters=None):
         limit (int, opcional): Número máximo de especies a recuperar por solicitud (paginación).
         offset (int, opcional): Desplazamiento inicial para la paginación.
         filters (dict, opcional): Diccionario de filtros para refinar la búsqueda. 
-            Las claves deben coincidir con las definidas en FILTER_KEY_MAP o en la API directamente.
+            Las claves deben coincidir con las definidas en get_filter_key_map() o en la API directamente.
             Para mayor rapidez en la creación y uso de filtros usar help_filters().
             Se pueden combinar múltiples filtros en un solo diccionario.
+        session (requests.Session, opcional): Sesión HTTP a usar. Por defecto, la sesión compartida.
+        local (bool): Si True, resuelve con el catálogo local los filtros que lo permiten. False fuerza la API.
 
     Flujo:
-        - Realiza solicitudes paginadas a la API de IEPNB hasta que no haya más datos.
-        - Aplica filtros opcionales a cada solicitud para refinar los resultados.
+        - Devuelve la lista cacheada si se pidió con los mismos filtros hace menos de SPECIES_LIST_TTL.
+        - Si local y los filtros lo permiten, los resuelve con el catálogo local sin llamar a la API.
+        - Si no, pide la primera página a la API de IEPNB y, si viene llena, el resto de páginas
+          de SPECIES_LIST_WORKERS en SPECIES_LIST_WORKERS a la vez hasta que una venga incompleta.
         - Registra las URLs de las solicitudes para diagnóstico y depuración.
-        - Si se encuentra un error en la respuesta de la API, se detiene el proceso.
+        - Si se encuentra un error en la respuesta de la API, se detiene el proceso (y no se cachea).
         - Acumula todas las especies recuperadas en una lista.
 
     Returns:
         list: Lista de especies obtenidas desde la API de IEPNB.
     """
+    cache = get_species_list_cache()
+    cache_key = json.dumps({"filters": filters, "limit": limit, "offset": offset, "local": local}, sort_keys=True, default=str, ensure_ascii=False)
+    cached = cache.get(cache_key)
+    if cached and time.time() - cached[0] < SPECIES_LIST_TTL:
+        return list(cached[1])
+
+    species_list = local_species_list(filters) if local else None
+    if species_list is not None:
+        species_list = species_list[offset:]
+        log(f"Lista de especies resuelta con el Excel de MITECO: {len(species_list)} registros.")
+        cache[cache_key] = (time.time(), species_list)
+        return list(species_list)
+
     log("Descargando lista de especies desde la API IEPNB...")
-    species_list = []
-    while True:
-        params = {"limit": limit, "offset": offset}
-        if filters:
-            for k, v in filters.items():
-                actual_key = FILTER_KEY_MAP.get(k, k)
-                params[actual_key] = v
-        response = requests.get(IEPNB_API, params=params)
-        log("URL de la petición: " + response.url)
-        if response.status_code != 200:
-            log(f"Error en la descarga: {response.status_code}")
-            break
-        data = response.json()
-        if not data:
-            break
-        species_list.extend(data)
-        offset += limit
+    complete = True
+    species_list = fetch_species_page(offset, limit, filters, session)
+    if species_list is None:
+        species_list, complete = [], False
+    elif len(species_list) == limit:
+        # La primera página viene llena: el resto se pide por tandas en paralelo
+        next_offset = offset + limit
+        with ThreadPoolExecutor(max_workers=SPECIES_LIST_WORKERS) as executor:
+            while True:
+                offsets = [next_offset + i * limit for i in range(SPECIES_LIST_WORKERS)]
+                pages = list(executor.map(lambda page_offset: fetch_species_page(page_offset, limit, filters, session), offsets))
+                for page in pages:
+                    species_list.extend(page or [])
+                if any(page is None for page in pages):
+                    complete = False
+                    break
+                if any(len(page) < limit for page in pages):
+                    break
+                next_offset = offsets[-1] + limit
+
     log(f"Total de especies recuperadas: {len(species_list)}")
-    return species_list
+    if complete:
+        cache[cache_key] = (time.time(), species_list)
+    return list(species_list)
+
+# Función para recorrer por páginas los resultados de CrossRef de un género
+def iter_crossref_pages(genus, budget=CROSSREF_GENUS_BUDGET, session=None, from_index_date=None, until_index_date=None):
+    """
+    Recorre los artículos de CrossRef de un género con paginación por cursor (cursor=*),
+    devolviendo cada página en cuanto llega, hasta agotar los resultados o el presupuesto.
+
+    Args:
+        genus (str): Género a buscar.
+        budget (int): Número máximo de artículos a recuperar para el género.
+        session (requests.Session, opcional): Sesión HTTP a usar. Por defecto, la sesión compartida.
+        from_index_date (str, opcional): Solo artículos indexados por CrossRef desde esta fecha ("YYYY-MM-DD").
+        until_index_date (str, opcional): Solo artículos indexados por CrossRef hasta esta fecha ("YYYY-MM-DD").
+
+    Yields:
+        list: Artículos (items de CrossRef) de cada página.
+    """
+    crossref_filter = "type:journal-article"
+    if from_index_date:
+        crossref_filter += f",from-index-date:{from_index_date}"
+    if until_index_date:
+        crossref_filter += f",until-index-date:{until_index_date}"
+
+    cursor = "*"
+    remaining = budget
+    while remaining > 0 and cursor:
+        rows = min(CROSSREF_PAGE_SIZE, remaining)
+        params = {
+            "query.bibliographic": f"\"{genus}\"",
+            "filter": crossref_filter,
+            "rows": rows,
+            "sort": "issued",
+            "order": "desc",
+            # Los metadatos llegan en la propia búsqueda: solo los registros incompletos se piden por DOI
+            "select": ",".join(CROSSREF_FIELDS),
+            "cursor": cursor,
+        }
+        response = http_get(CROSSREF_API, session=session, params=params)
+        response.raise_for_status()
+        message = response.json().get("message", {})
+        items = message.get("items", [])
+        if not items:
+            break
+        yield items
+        remaining -= len(items)
+        # Una página incompleta es la última; el cursor solo sirve mientras haya más resultados
+        cursor = message.get("next-cursor") if len(items) == rows else None
 
 # Función para buscar artículos científicos para una especie específica
-def fetcher_cf(species_name, n_species):
+def fetcher_cf(species_name, n_species, session=None, from_index_date=None, until_index_date=None):
     """
     Obtiene artículos científicos para una especie específica desde la API de CrossRef.
 
     Args:
         species_name (str): Nombre de la especie científica.
-        n_species (int): Número total de especies a procesar, para ajustar el límite de búsqueda.
+        n_species (int): Número total de especies a procesar. Ya no recorta la búsqueda: cada género
+            tiene su propio presupuesto, CROSSREF_GENUS_BUDGET.
+        session (requests.Session, opcional): Sesión HTTP a usar. Por defecto, la sesión compartida.
+        from_index_date (str, opcional): Solo artículos indexados por CrossRef desde esta fecha ("YYYY-MM-DD").
+        until_index_date (str, opcional): Solo artículos indexados por CrossRef hasta esta fecha ("YYYY-MM-DD").
 
     Returns:
         list: Lista de artículos recuperados desde CrossRef.
     """
-    total_available_rows = 9900
-    rows_per_species = total_available_rows // n_species
-    if rows_per_species > 350:
-        rows_per_species = 350
-    log(f"🔍 Buscando artículos para la especie: {species_name}... | Máx. artículos: {rows_per_species}")
+    log(f"🔍 Buscando artículos para la especie: {species_name}... | Máx. artículos: {CROSSREF_GENUS_BUDGET}")
 
     genus = species_name.split()[0]
-    query_url = (
-        f"{CROSSREF_API}?query.bibliographic=\"{genus}\""
-        f"&filter=type:journal-article&rows={rows_per_species}&sort=issued&order=desc&select=DOI"
-    )
-
-    response = requests.get(query_url)
-    response.raise_for_status()
-    data = response.json().get("message", {}).get("items", [])
+    data = [
+        item
+        for page in iter_crossref_pages(genus, session=session, from_index_date=from_index_date, until_index_date=until_index_date)
+        for item in page
+    ]
 
     log(f"🔍 Artículos recuperados de Crossref: {len(data)} para la especie {species_name}.")
     return data
 
-# Función para procesar los artículos obtenidos
-def fetcher_processor(data, species_name):
+# Función para resolver una única vez los DOIs obtenidos
+def resolve_articles(data, species_name):
     """
-    Procesa una lista de artículos obtenidos, verificando su abstract y clasificándolos.
+    Resuelve los metadatos y el abstract de cada DOI una sola vez, sin clasificar los artículos.
 
     Args:
         data (list): Lista de artículos obtenidos desde la API.
-        species_name (str): Nombre de la especie científica.
+        species_name (str): Nombre de la especie (o género) con el que se buscaron los artículos.
 
     Returns:
-        list: Lista de artículos procesados con información sobre abstract y criterio.
+        list: Lista de artículos con metadatos y abstract, pendientes de clasificar por especie.
     """
-    articles = []
-    processed_dois = set()
+    return get_fetch_engine().run(resolve_articles_async(data, species_name))
+
+async def resolve_articles_async(data, species_name):
+    """
+    Versión asíncrona de resolve_articles: todos los DOIs se resuelven a la vez en el motor
+    asíncrono, limitados solo por la concurrencia de cada host.
+
+    Args:
+        data (list): Lista de artículos obtenidos desde la API.
+        species_name (str): Nombre de la especie (o género) con el que se buscaron los artículos.
 
+    Returns:
+        list: Lista de artículos resueltos, en el orden de `data`.
+    """
+    unique_items = {}
     for item in data:
         doi = item.get("DOI")
-        if doi not in processed_dois:
-            processed_dois.add(doi)
-            article = fetch_article_by_doi(doi, species_name, use_web_abstract=True)
+        if doi:
+            unique_items.setdefault(normalize_doi(doi), item)
 
-            if article:
-                if not article.get("abstract") and article.get("url"):
-                    abstract = fetch_abstract_from_web(article.get("url"))
-                    if not abstract:
-                        abstract = fetch_abstract_from_semantic_scholar(doi, article.get("title"))
+    articles = await asyncio.gather(*(
+        resolve_article_async(item["DOI"], species_name, item) for item in unique_items.values()
+    ))
+    return [article for article in articles if article]
 
-                    if abstract:
-                        article["abstract"] = abstract
+async def resolve_article_async(doi, species_name, item=None):
+    """
+    Resuelve los metadatos de un DOI y, si no trae abstract, lo busca en la web y en Semantic Scholar.
+    Antes se consulta la caché negativa de abstracts: si el DOI ya falló y aún no toca reintentarlo,
+    no se busca. Si ambas fuentes fallan, el fallo se registra con su motivo.
 
-                article["abs_pres"] = 1 if article.get("abstract") else 0
+    Args:
+        doi (str): DOI del artículo.
+        species_name (str): Nombre de la especie (o género) asociada al artículo.
+        item (dict, opcional): Registro de la búsqueda de CrossRef, para no pedir el DOI si está completo.
 
-                if validate_species(article, species_name, allow_abbreviation=True):
-                    article["criterio"] = "Exacto"
-                else:
-                    article["criterio"] = "Genus"
+    Returns:
+        dict or None: Artículo con metadatos, abstract y abs_pres, o None si no se pudo resolver.
+    """
+    article = await resolve_article_metadata_async(doi, species_name, item)
+    if article:
+        article = await enrich_article_abstract_async(article)
+    return article
 
-                articles.append(article)
+async def resolve_article_metadata_async(doi, species_name, item=None):
+    """
+    Resuelve los metadatos de CrossRef de un DOI, sin buscar el abstract fuera de CrossRef.
 
-    log(f"🔎 Completado: {species_name} | Artículos procesados: {len(articles)}")
-    return articles
+    Args:
+        doi (str): DOI del artículo.
+        species_name (str): Nombre de la especie (o género) asociada al artículo.
+        item (dict, opcional): Registro de la búsqueda de CrossRef, para no pedir el DOI si está completo.
+
+    Returns:
+        dict or None: Artículo con metadatos, o None si no se pudo resolver.
+    """
+    # La web se consulta en enrich_article_abstract_async, no también dentro de fetch_article_by_doi
+    return await fetch_article_by_doi_async(doi, species_name, use_web_abstract=False, item=item)
+
+async def enrich_article_abstract_async(article):
+    """
+    Si el artículo no trae abstract, lo busca en la web y en Semantic Scholar (consultando antes la
+    caché negativa de abstracts) y marca abs_pres.
 
-# Función para buscar y procesar artículos en paralelo
-def fetcher_pipe(species_name, n_species):
+    Args:
+        article (dict): Artículo con metadatos (ver resolve_article_metadata_async).
+
+    Returns:
+        dict: El mismo artículo, con abstract si se encontró y abs_pres.
+    """
+    doi = article.get("DOI")
+    if not article.get("abstract") and article.get("url"):
+        miss = await asyncio.to_thread(abstract_miss_get, doi)
+        if miss is None or miss["retry_at"] <= time.time():
+            abstract, reason = await lookup_abstract_from_web_async(article.get("url"))
+            s2_reason = None
+            if not abstract:
+                abstract, s2_reason = await lookup_abstract_from_semantic_scholar_async(doi, article.get("title"))
+                # Se vuelve a intentar en cuanto cualquiera de las dos fuentes pueda haber cambiado
+                reason = min(reason, s2_reason, key=lambda key: ABSTRACT_MISS_TTL.get(key, ABSTRACT_MISS_TTL["error"]))
+
+            if abstract:
+                article["abstract"] = abstract
+                if miss is not None:
+                    await asyncio.to_thread(abstract_miss_clear, doi)
+            elif s2_reason not in ("timeout", "error"):
+                # Si la consulta a Semantic Scholar falló no se sabe si tiene el abstract: no se registra el fallo
+                await asyncio.to_thread(abstract_miss_put, doi, reason, (miss["failures"] if miss else 0) + 1)
+
+    article["abs_pres"] = 1 if article.get("abstract") else 0
+    return article
+
+# Función para clasificar artículos ya resueltos para una especie
+def classify_articles(articles, species_name):
+    """
+    Asigna los artículos resueltos a una especie y los clasifica como Exacto o Genus.
+
+    Args:
+        articles (list): Lista de artículos resueltos con resolve_articles.
+        species_name (str): Nombre de la especie científica.
+
+    Returns:
+        list: Copia de los artículos con 'scientific name' y 'criterio' de la especie.
+    """
+    classified = []
+    for article in articles:
+        article = dict(article, **{"scientific name": species_name})
+
+        if validate_species(article, species_name, allow_abbreviation=True):
+            article["criterio"] = "Exacto"
+        else:
+            article["criterio"] = "Genus"
+
+        classified.append(article)
+    return classified
+
+# Función para procesar los artículos obtenidos
+def fetcher_processor(data, species_name):
     """
-    Combina la obtención y procesamiento de artículos científicos para una especie.
+    Procesa una lista de artículos obtenidos, verificando su abstract y clasificándolos.
 
     Args:
+        data (list): Lista de artículos obtenidos desde la API.
         species_name (str): Nombre de la especie científica.
-        n_species (int): Número total de especies a procesar.
 
     Returns:
         list: Lista de artículos procesados con información sobre abstract y criterio.
     """
-    data = fetcher_cf(species_name, n_species)
-    articles = fetcher_processor(data, species_name)
+    articles = classify_articles(resolve_articles(data, species_name), species_name)
+
+    log(f"🔎 Completado: {species_name} | Artículos procesados: {len(articles)}")
     return articles
 
+# Función para agrupar las especies por género
+def plan_genus_groups(species_names):
+    """
+    Agrupa las especies por género, ya que la búsqueda en CrossRef solo usa el género.
+    Así se hace una única búsqueda por género en lugar de una por especie.
+
+    Args:
+        species_names (list of str): Nombres científicos de las especies (pueden repetirse).
+
+    Returns:
+        dict: Diccionario {género: [especies únicas]} en el orden original.
+    """
+    groups = {}
+    for name in species_names:
+        if not name or not str(name).split():
+            continue
+        name = str(name)
+        genus_species = groups.setdefault(name.split()[0], [])
+        if name not in genus_species:
+            genus_species.append(name)
+    return groups
+
+# Ejecutor por etapas: búsqueda → resolución de DOIs → abstracts → clasificación
+class StagedPipeline:
+    """
+    Etapas encadenadas por colas acotadas, cada una con su propio pool de hilos. Cada etapa lee
+    de su cola y lo que produce va a la cola de la siguiente; si una etapa se retrasa, su cola se
+    llena y la anterior espera al hacer put (back-pressure). Así el ritmo lo marca la etapa más
+    lenta y no se acumulan en memoria trabajos a medio hacer. La salida de la última etapa queda
+    en `results`.
+
+    Cada etapa es (nombre, función, hilos): la función recibe un elemento y devuelve (o va
+    produciendo, si es un generador) los elementos para la siguiente etapa. Si la función lanza
+    una excepción, en lugar de perder el elemento se envía a la siguiente etapa lo que devuelva
+    on_error(nombre de la etapa, elemento, excepción), para que quien espera en `results` se entere.
+    """
+
+    def __init__(self, stages, on_error, queue_size=PIPELINE_QUEUE_SIZE):
+        self.inboxes = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.results = queue.Queue()
+        self.workers = [workers for _, _, workers in stages]
+        self.on_error = on_error
+        self.closed = threading.Event()
+        for index, (name, func, workers) in enumerate(stages):
+            outbox = self.inboxes[index + 1] if index + 1 < len(stages) else self.results
+            for n in range(workers):
+                threading.Thread(
+                    target=self.work, args=(name, func, self.inboxes[index], outbox),
+                    name=f"rosalia-{name}-{n}", daemon=True
+                ).start()
+
+    def work(self, name, func, inbox, outbox):
+        """Bucle de un hilo de una etapa; termina al recibir None. Tras close() descarta lo que le llegue."""
+        while True:
+            item = inbox.get()
+            if item is None:
+                return
+            if self.closed.is_set():
+                continue
+            try:
+                for output in func(item):
+                    if self.closed.is_set():
+                        break
+                    outbox.put(output)
+            except Exception as e:
+                log(f"⚠️ Error en la etapa {name} del pipeline: {str(e)}")
+                outbox.put(self.on_error(name, item, e))
+
+    def feed(self, items):
+        """Envía los elementos a la primera etapa desde un hilo aparte, para no bloquear a quien lee `results`."""
+        def put_all():
+            for item in items:
+                if self.closed.is_set():
+                    return
+                self.inboxes[0].put(item)
+        threading.Thread(target=put_all, name="rosalia-pipeline-feed", daemon=True).start()
+
+    def close(self):
+        """
+        Detiene los hilos de todas las etapas. Si aún quedaban elementos (p. ej. quien leía `results`
+        ha fallado), las etapas los descartan en lugar de procesarlos.
+        """
+        self.closed.set()
+        for inbox, workers in zip(self.inboxes, self.workers):
+            for _ in range(workers):
+                inbox.put(None)
+
+def search_stage(task):
+    """
+    Etapa de búsqueda: recorre las páginas de CrossRef de un género y emite cada DOI nuevo en cuanto
+    llega su página. Al final emite cuántos DOIs se emitieron y el error, si la búsqueda falló.
+
+    Args:
+        task (dict): {"genus", "from_index_date", "until_index_date"}.
+
+    Yields:
+        tuple: ("article", género, item de CrossRef) y, al final, ("searched", género, nº de DOIs, error o None).
+    """
+    genus = task["genus"]
+    log(f"🔍 Buscando artículos para el género: {genus}... | Máx. artículos: {CROSSREF_GENUS_BUDGET}")
+    seen_dois = set()
+    error = None
+    try:
+        pages = iter_crossref_pages(
+            genus, from_index_date=task.get("from_index_date"), until_index_date=task.get("until_index_date")
+        )
+        for page in pages:
+            for item in page:
+                doi = normalize_doi(item.get("DOI"))
+                if doi and doi not in seen_dois:
+                    seen_dois.add(doi)
+                    yield ("article", genus, item)
+    except Exception as e:
+        log(f"⚠️ Error buscando artículos del género {genus}: {str(e)}")
+        error = e
+    yield ("searched", genus, len(seen_dois), error)
+
+def resolve_stage(message):
+    """Etapa de resolución: metadatos de CrossRef de cada DOI (ver resolve_article_metadata_async)."""
+    if message[0] != "article":
+        return [message]
+    _, genus, item = message
+    try:
+        article = get_fetch_engine().run(resolve_article_metadata_async(item["DOI"], genus, item))
+    except Exception as e:
+        log(f"⚠️ Error resolviendo el DOI {item.get('DOI')}: {str(e)}")
+        article = None
+    return [("article", genus, article)]
+
+def enrich_stage(message):
+    """Etapa de abstracts: web de la editorial y Semantic Scholar (ver enrich_article_abstract_async)."""
+    if message[0] != "article" or message[2] is None:
+        return [message]
+    _, genus, article = message
+    try:
+        article = get_fetch_engine().run(enrich_article_abstract_async(article))
+    except Exception as e:
+        log(f"⚠️ Error buscando el abstract de {article.get('DOI')}: {str(e)}")
+        article["abs_pres"] = 1 if article.get("abstract") else 0
+    return [("article", genus, article)]
+
+class GenusCollector:
+    """
+    Etapa de clasificación: junta los artículos de cada género (llegan en cualquier orden) y,
+    cuando están todos los que emitió la búsqueda, los clasifica para cada especie del género.
+    Un mensaje ("failed", género, error) de una etapa anterior termina el género con ese error.
+    Guarda estado, así que la etapa debe tener un único hilo.
+    """
+
+    def __init__(self, species_by_genus):
+        self.species_by_genus = species_by_genus
+        self.genera = {}
+        self.failed = set()  # Géneros ya entregados con error: se ignora lo que llegue después
+
+    def __call__(self, message):
+        genus = message[1]
+        if genus in self.failed:
+            return []
+        if message[0] == "failed":
+            self.genera.pop(genus, None)
+            self.failed.add(genus)
+            return [(genus, {}, message[2])]
+        state = self.genera.setdefault(genus, {"articles": [], "received": 0, "expected": None, "error": None})
+        if message[0] == "article":
+            state["received"] += 1
+            if message[2]:
+                state["articles"].append(message[2])
+        else:
+            state["expected"], state["error"] = message[2], message[3]
+        if state["expected"] is None or state["received"] < state["expected"]:
+            return []
+
+        del self.genera[genus]
+        species_names = self.species_by_genus[genus]
+        log(f"🧬 Género {genus}: {len(state['articles'])} artículos resueltos para {len(species_names)} especies.")
+        species_articles = {name: classify_articles(state["articles"], name) for name in species_names}
+        return [(genus, species_articles, state["error"])]
+
+def run_genus_pipeline(tasks, species_by_genus):
+    """
+    Procesa los géneros con el pipeline por etapas (PIPELINE_WORKERS hilos por etapa) y devuelve
+    cada género en cuanto termina, sin esperar a los demás.
+
+    Args:
+        tasks (list of dict): Un {"genus", "from_index_date", "until_index_date"} por género.
+        species_by_genus (dict): {género: [especies]} a las que repartir los artículos.
+
+    Yields:
+        tuple: (género, {especie: artículos clasificados}, error o None). Con error, el género
+            llega sin artículos.
+    """
+    pipeline = StagedPipeline([
+        ("search", search_stage, PIPELINE_WORKERS["search"]),
+        ("resolve", resolve_stage, PIPELINE_WORKERS["resolve"]),
+        ("enrich", enrich_stage, PIPELINE_WORKERS["enrich"]),
+        ("classify", GenusCollector(species_by_genus), 1),
+    ], on_error=genus_pipeline_failure)
+    # Quien consume el generador debe cerrarlo (with closing(...)) si deja de leer antes de tiempo
+    try:
+        pipeline.feed(tasks)
+        for _ in range(len(tasks)):
+            yield pipeline.results.get()
+    finally:
+        pipeline.close()
+
+def genus_pipeline_failure(stage, message, error):
+    """
+    Mensaje que sustituye al que una etapa del pipeline de géneros no pudo procesar: las etapas
+    intermedias lo pasan tal cual y GenusCollector termina el género con el error.
+
+    Args:
+        stage (str): Etapa que falló.
+        message: Elemento que recibía (la tarea del género o una tupla (tipo, género, ...)).
+        error (Exception): Excepción lanzada.
+
+    Returns:
+        tuple: ("failed", género, error), o el resultado final (género, {}, error) si falló la clasificación.
+    """
+    genus = message["genus"] if isinstance(message, dict) else message[1]
+    if stage == "classify":
+        return (genus, {}, error)
+    return ("failed", genus, error)
+
+# Reglas de limpieza de abstracts, compiladas una sola vez
+ABSTRACT_HTML_RE = re.compile(r'<.*?>|\n|\r')                                   # Etiquetas HTML y saltos de línea
+ABSTRACT_LEADING_SYMBOLS_RE = re.compile(r'^[-=+*/%<>^&|]+')                      # Símbolos matemáticos al inicio
+ABSTRACT_WORD_RE = re.compile(r'abstract', re.IGNORECASE)                         # La palabra "abstract" en cualquier posición
+ABSTRACT_PREFIX_RE = re.compile(r'^(?:summary:?\s+)?(?:article:?\s+)?', re.IGNORECASE)  # "summary" y/o "article" como primera palabra
+MULTIPLE_SPACES_RE = re.compile(r'\s{2,}')
+INVALID_ABSTRACT_RE = re.compile(r'Your purchase has been completed|This retracts the article')
+RETRACTED_TITLE_RE = re.compile(r"^[\[\(\s]{0,2}retracted[\]\)\s]{0,2}", re.IGNORECASE)
+
+# Función para quedarse solo con el texto en inglés de un abstract
+def filter_english(text):
+    """
+    Devuelve el abstract si está en inglés. El idioma se detecta una sola vez para todo el texto
+    y solo si el resultado no es concluyente (texto mezclado) se recurre a la detección por frases
+    de extract_english_block.
+
+    Args:
+        text (str): Abstract ya limpio.
+
+    Returns:
+        str: El abstract, solo su bloque en inglés, o cadena vacía si no está en inglés.
+    """
+    lang, prob = detect_language_with_confidence(text)
+    if lang != "en":
+        return ""
+    if prob >= LANG_CONFIDENCE_THRESHOLD:
+        return text
+    return extract_english_block(text)
+
+_language_pool = None
+
+def start_language_pool():
+    """
+    Crea el pool de procesos de detección de idioma (LANG_WORKERS procesos, arrancados con
+    LANG_MP_START_METHOD). Se llama al principio del punto de entrada, antes de arrancar ningún hilo,
+    y se cierra con stop_language_pool. Sin pool, filter_english_batch trabaja en el propio proceso.
+    """
+    global _language_pool
+    if _language_pool is None and LANG_WORKERS > 1:
+        _language_pool = ProcessPoolExecutor(
+            max_workers=LANG_WORKERS,
+            mp_context=multiprocessing.get_context(LANG_MP_START_METHOD)
+        )
+
+def stop_language_pool():
+    """Cierra el pool de procesos de detección de idioma, si existe."""
+    global _language_pool
+    if _language_pool is not None:
+        _language_pool.shutdown(cancel_futures=True)
+        _language_pool = None
+
+# Función para filtrar el idioma de una columna completa de abstracts
+def filter_english_batch(texts):
+    """
+    Aplica filter_english a todos los abstracts no vacíos de una columna. Si el pool de procesos
+    está creado (start_language_pool) y hay al menos LANG_PARALLEL_MIN, la detección se reparte
+    entre sus procesos; si el pool falla, se hace en el propio proceso.
+
+    Args:
+        texts (list of str): Abstracts ya limpios.
+
+    Returns:
+        list of str: Abstracts filtrados, en el mismo orden.
+    """
+    pending = [i for i, text in enumerate(texts) if text]
+    results = list(texts)
+    filtered = None
+
+    if _language_pool is not None and len(pending) >= LANG_PARALLEL_MIN:
+        try:
+            filtered = list(_language_pool.map(filter_english, [texts[i] for i in pending], chunksize=64))
+        except Exception as e:
+            log(f"⚠️ Detección de idioma en paralelo no disponible ({str(e)}), se hace en un solo proceso.")
+
+    if filtered is None:
+        filtered = [filter_english(texts[i]) for i in pending]
+
+    for i, text in zip(pending, filtered):
+        results[i] = text
+    return results
+
 # Función para limpiar los abstracts
 def abstract_cleaning(df):
     """
@@ -595,42 +2514,50 @@ def abstract_cleaning(df):
     """
     log(f"Mejorando output de abstracts...")
 
+    titles = df['title'].fillna("").astype(str)
+    genera = [name.split()[0].lower() if name.split() else "" for name in df['scientific name'].fillna("").astype(str)]
+
     # Limpiar etiquetas HTML, saltos de línea y símbolos matemáticos al inicio en abstracts (pueden tener contenido matemático luego)
-    df['abstract'] = df['abstract'].fillna("").apply(lambda x: re.sub(r'^[-=+*/%<>^&|]+', '', re.sub(r'<.*?>|\n|\r', ' ', x)).strip())
+    abstracts = (
+        df['abstract'].fillna("").astype(str)
+        .str.replace(ABSTRACT_HTML_RE, ' ', regex=True)
+        .str.replace(ABSTRACT_LEADING_SYMBOLS_RE, '', regex=True)
+        .str.strip()
+    )
 
     # Verificar si el abstract es similar al título y eliminarlo, el abstract no puede ser lo mismo que el título. Lo hacemos antes de otras limpiezas para facilitar la detección exacta
-    df['abstract'] = df.apply(lambda row: "" if row['title'].strip().lower() in row['abstract'].lower() and len(row['abstract']) <= len(row['title']) + 20 else row['abstract'], axis=1)
-    
-    # Eliminar la palabra "abstract" en cualquier variación de mayúsculas/minúsculas
-    df['abstract'] = df['abstract'].str.replace(r'abstract', '', case=False, regex=True)
-
-    # Eliminar "summary" o "summary:" si es la primera palabra del abstract en cualquier variación de mayúsculas/minúsculas
-    df['abstract'] = df['abstract'].str.replace(r'^(summary:?)(\s+)', '', case=False, regex=True)
-
-    # Eliminar "article" o "article:" si es la primera palabra del abstract en cualquier variación de mayúsculas/minúsculas
-    df['abstract'] = df['abstract'].str.replace(r'^(article:?)(\s+)', '', case=False, regex=True)
-
-    # Eliminar espacios duplicados
-    df['abstract'] = df['abstract'].str.replace(r'\s{2,}', ' ', regex=True).str.strip()
-   
-    # Vaciar abstract si no está en inglés. Puede que haya abstracts en otros idiomas, pero generamente están mezclados con otros idiomas y/o con otros abstracts, siendo esta parte con otros abstract dañina para la calidad del dato, ganamos robustez
-    df['abstract'] = df['abstract'].apply(lambda x: x if x == "" or detect_language(x) == "en" else "")
-
-    # Extraer solo el bloque en inglés si hay texto mixto. Si el inglés está mezclado con otros idiomas pero es dominante en inglés, pasa el filtro anterior (abstract en varios idiomas). Esto nos devolverá solo el bloque en inglés
-    df['abstract'] = df['abstract'].apply(lambda x: extract_english_block(x) if x else x)
-
-    # Vaciar abstract si la primera palabra de 'scientific name' no aparece en el abstract. Se perderán abstract pero se gana en calidad del dato, evitando abstracts emplazados erroneamente.
-    df['abstract'] = df.apply(lambda row: row['abstract'] if row['abstract'] == "" or row['scientific name'].split()[0].lower() in row['abstract'].lower() else "",axis=1)
+    abstracts = pd.Series([
+        "" if title.strip().lower() in abstract.lower() and len(abstract) <= len(title) + 20 else abstract
+        for title, abstract in zip(titles, abstracts)
+    ], index=df.index, dtype=object)
+
+    # Eliminar la palabra "abstract", "summary"/"article" como primera palabra y espacios duplicados
+    abstracts = (
+        abstracts
+        .str.replace(ABSTRACT_WORD_RE, '', regex=True)
+        .str.replace(ABSTRACT_PREFIX_RE, '', regex=True)
+        .str.replace(MULTIPLE_SPACES_RE, ' ', regex=True)
+        .str.strip()
+    )
 
-    # Eliminar abstracts que contienen el mensaje de compra completada o de artículos retirados
-    df['abstract'] = df['abstract'].apply(lambda x: "" if "Your purchase has been completed" in x else x)
+    # Antes de detectar el idioma (lo más caro) se vacían los abstracts que se descartarían de todos modos:
+    # los de artículos retirados y los que no mencionan el género (eliminar frases no puede hacer que aparezca)
+    abstracts = [
+        "" if RETRACTED_TITLE_RE.match(title.strip()) or genus not in abstract.lower() else abstract
+        for title, genus, abstract in zip(titles, genera, abstracts)
+    ]
 
-    df['abstract'] = df['abstract'].apply(lambda x: "" if "This retracts the article" in x else x)
+    # Vaciar abstract si no está en inglés y, si el texto está mezclado, quedarse solo con el bloque en inglés. Una sola detección por abstract; por frases solo si es ambigua
+    abstracts = filter_english_batch(abstracts)
 
-    df['abstract'] = df.apply(lambda row: "" if re.match(r"^[\[\(\s]{0,2}retracted[\]\)\s]{0,2}", row['title'].strip(), re.IGNORECASE) else row['abstract'],axis=1)
+    # Vaciar abstract si el género ya no aparece tras quitar los bloques en otros idiomas, o si es un mensaje de compra completada o de artículo retirado
+    df['abstract'] = [
+        abstract if abstract and genus in abstract.lower() and not INVALID_ABSTRACT_RE.search(abstract) else ""
+        for genus, abstract in zip(genera, abstracts)
+    ]
 
     # Ajustar abs_pres a 0 si el abstract está vacío para facilitar procesamiento posterior
-    df['abs_pres'] = df['abstract'].apply(lambda x: 0 if x == "" else 1)
+    df['abs_pres'] = (df['abstract'] != "").astype(int)
 
     log(f"Abstracts mejorados.")
     return df
@@ -654,21 +2581,129 @@ def get_fetcher_lists(filter_df):
 
     return {f"Fetcher_list_VM{i+1}": chunk for i, chunk in enumerate(species_chunks)}
 
+# Esquema fijo de los artículos, para que todos los lotes del dataset Parquet sean compatibles
+ARTICLE_SCHEMA = pa.schema([
+    ("scientific name", pa.string()),
+    ("title", pa.string()),
+    ("year", pa.int64()),
+    ("authors", pa.string()),
+    ("abstract", pa.string()),
+    ("url", pa.string()),
+    ("DOI", pa.string()),
+    ("abs_pres", pa.int64()),
+    ("criterio", pa.string()),
+])
+
+class ParquetBatchWriter:
+    """
+    Escribe lotes de artículos ya limpios como ficheros de un dataset Parquet, a medida que
+    llegan, sin acumular el corpus en memoria. Los filtros usados se guardan en los
+    metadatos del esquema de cada fichero.
+    """
+
+    def __init__(self, dataset_dir, filters, overwrite=True):
+        self.dataset_dir = dataset_dir
+        self.metadata = {
+            b"rosalia_filters": json.dumps(filters, default=str, ensure_ascii=False).encode("utf-8"),
+            b"rosalia_created": datetime.now().isoformat(timespec="seconds").encode("utf-8"),
+        }
+        if overwrite:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+        os.makedirs(dataset_dir, exist_ok=True)
+        self.parts = len([name for name in os.listdir(dataset_dir) if name.endswith(".parquet")])
+        self.rows = 0
+
+    def write(self, articles):
+        """
+        Limpia un lote de artículos con abstract_cleaning y lo añade al dataset como un fichero nuevo.
+
+        Args:
+            articles (list): Lista de artículos (dicts) a escribir.
+        """
+        if not articles:
+            return
+        df = abstract_cleaning(pd.DataFrame(articles, columns=ARTICLE_SCHEMA.names))
+        df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
+        table = pa.Table.from_pandas(df, schema=ARTICLE_SCHEMA, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **self.metadata})
+        pq.write_table(table, os.path.join(self.dataset_dir, f"part-{self.parts:05d}.parquet"))
+        self.parts += 1
+        self.rows += len(df)
+
+# Función para leer el dataset Parquet de artículos
+def read_articles_dataset(dataset_dir):
+    """
+    Lee el dataset Parquet de artículos y lo ordena como la salida Excel original.
+
+    Args:
+        dataset_dir (str): Carpeta del dataset.
+
+    Returns:
+        pd.DataFrame: Artículos ordenados por especie, año (descendente) y criterio.
+    """
+    df = pq.read_table(dataset_dir).to_pandas()
+    return df.sort_values(by=["scientific name", "year", "criterio"], ascending=[True, False, True], ignore_index=True)
+
+# Función para leer qué artículos hay ya en el dataset
+def load_dataset_keys(dataset_dir):
+    """
+    Devuelve los pares (especie, DOI) ya presentes en el dataset, leyendo solo esas dos columnas.
+
+    Args:
+        dataset_dir (str): Carpeta del dataset.
+
+    Returns:
+        set: Pares (especie, DOI normalizado). Vacío si el dataset no existe.
+    """
+    if not os.path.isdir(dataset_dir) or not any(name.endswith(".parquet") for name in os.listdir(dataset_dir)):
+        return set()
+    table = pq.read_table(dataset_dir, columns=["scientific name", "DOI"])
+    return {
+        (species_name, normalize_doi(doi))
+        for species_name, doi in zip(table.column("scientific name").to_pylist(), table.column("DOI").to_pylist())
+    }
+
+# Función para exportar el dataset Parquet a Excel
+def export_dataset_to_excel(dataset_dir, output_file, filters):
+    """
+    Exporta el dataset Parquet de artículos a Excel, guardando los filtros usados en las propiedades del libro.
+
+    Args:
+        dataset_dir (str): Carpeta del dataset.
+        output_file (str): Ruta del Excel a generar.
+        filters (dict): Filtros usados, para los metadatos del Excel.
+    """
+    df = read_articles_dataset(dataset_dir)
+    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False)
+        writer.book.properties.keywords = f"Filtros usados: {filters}"
+    log(f"\n📁 Archivo generado: {output_file}")
+
 # Función para actualizar artículos de especies
 
-def update_species_articles(filters=None):
+def update_species_articles(filters=None, resume=True, export_excel=EXPORT_EXCEL, incremental=INCREMENTAL_REFRESH):
     """
     Actualiza los artículos científicos para una lista de especies, procesándolos de manera paralela.
     5 es el límite para Crossref, ponemos max_workers=4 para ser conservadores.
 
     Args:
         filters (dict, opcional): Diccionario de filtros para determinar las especies a procesar.
+        resume (bool): Si True, reanuda desde el checkpoint de una ejecución anterior interrumpida
+            con los mismos filtros, saltando las especies ya completadas.
+        export_excel (bool): Si True, exporta también el dataset a OUTPUT_FILE al terminar.
+        incremental (bool): Si True, en lugar de regenerar OUTPUT_DATASET pide a CrossRef solo los
+            artículos indexados desde la última ejecución completada de cada especie y añade al
+            dataset los que no tenía. Los géneros con alguna especie nunca actualizada se descargan completos.
 
     Flujo:
         - Recupera la lista de especies a procesar.
-        - Utiliza un ThreadPoolExecutor para buscar y procesar artículos en paralelo para cada especie.
-        - Clasifica los artículos en principales (con abstract válido) y auxiliares (sin abstract).
-        - Almacena los artículos principales y auxiliares en archivos Excel separados.
+        - Descarta las especies ya completadas según el checkpoint (si resume=True).
+        - Pasa todos los géneros por el pipeline por etapas (run_genus_pipeline): búsqueda, resolución
+          de DOIs, abstracts y clasificación avanzan a la vez, cada una con sus propios hilos.
+        - Guarda en el checkpoint los artículos de cada género en cuanto termina.
+        - Limpia los artículos de cada género y los añade al dataset Parquet OUTPUT_DATASET.
+        - Registra hasta qué fecha de índice de CrossRef está actualizada cada especie.
+        - Exporta opcionalmente el dataset a Excel.
         - Registra el tiempo total de ejecución.
 
     Returns:
@@ -679,70 +2714,107 @@ def update_species_articles(filters=None):
         log("🚫 No se encontraron especies con los filtros dados.")
         return
 
-    chunks = chunk_list(species_list, 28)
-    total_species = len(species_list)
-    all_results = []
-
-    log(f"🧩 Total de especies: {total_species} en {len(chunks)} chunks de hasta 28.")
+    # Las ejecuciones incrementales tienen su propio checkpoint
+    checkpoint_dir = get_checkpoint_dir({**(filters or {}), "_incremental": True} if incremental else filters)
+    resumed_species = set()
+    if resume:
+        resumed_species = load_checkpoint(checkpoint_dir)
+        if resumed_species:
+            log(f"♻️ Reanudando desde {checkpoint_dir}: {len(resumed_species)} especies ya completadas.")
+    elif os.path.exists(checkpoint_dir):
+        shutil.rmtree(checkpoint_dir)
+
+    abstract_miss_purge()
+
+    # Una búsqueda por género: las especies del mismo género comparten consulta y DOIs
+    genus_groups = plan_genus_groups([species["WithoutAutorship"] for species in species_list])
+    pending_groups = {
+        genus: [name for name in names if name not in resumed_species]
+        for genus, names in genus_groups.items()
+    }
+    pending_groups = {genus: names for genus, names in pending_groups.items() if names}
+    total_species = sum(len(names) for names in pending_groups.values())
+    # Todas las búsquedas de la ejecución comparten la misma fecha de índice final
+    until_index_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    refresh_dates = {}
+    if incremental:
+        species_dates = get_species_refresh_dates(name for names in pending_groups.values() for name in names)
+        refresh_dates = {genus: get_genus_from_index_date(names, species_dates) for genus, names in pending_groups.items()}
+        refresh_dates = {genus: date for genus, date in refresh_dates.items() if date is not None}
+    # En modo incremental se añade al dataset existente sin repetir artículos que ya tenga
+    writer = ParquetBatchWriter(OUTPUT_DATASET, filters, overwrite=not incremental)
+    known_keys = load_dataset_keys(OUTPUT_DATASET) if incremental else None
+
+    def write_new_articles(articles):
+        if known_keys is not None:
+            articles = [
+                article for article in articles
+                if (article["scientific name"], normalize_doi(article.get("DOI"))) not in known_keys
+            ]
+            known_keys.update((article["scientific name"], normalize_doi(article.get("DOI"))) for article in articles)
+        writer.write(articles)
+
+    # Los artículos ya completados en una ejecución anterior van al dataset como primer lote
+    write_new_articles(load_checkpoint_articles(
+        checkpoint_dir,
+        [name for names in genus_groups.values() for name in names if name in resumed_species]
+    ))
+
+    log(f"🧩 Total de especies pendientes: {total_species} de {len(pending_groups)} géneros.")
+    if incremental:
+        log(f"🔁 Modo incremental hasta {until_index_date}: {len(refresh_dates)} géneros ya actualizados antes, "
+            f"{len(pending_groups) - len(refresh_dates)} se descargan completos.")
 
     overall_start_time = time.time()
-
-    for i, chunk in enumerate(chunks, start=1):
-        log(f"\n📦 Procesando chunk {i}/{len(chunks)} con {len(chunk)} especies...")
-
-        start_time = time.time()
-        chunk_results = []
-
-        with tqdm(total=len(chunk), desc=f"Chunk {i}", unit="especies") as pbar:
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = {
-                    executor.submit(fetcher_pipe, species["WithoutAutorship"], len(chunk)): species
-                    for species in chunk
-                }
-                for future in as_completed(futures):
-                    species = futures[future]
-                    articles = future.result()
-                    chunk_results.extend(articles)
-
-                    # Logging detallado
-                    exact_count = sum(1 for a in articles if a['criterio'] == 'Exacto')
-                    genus_count = sum(1 for a in articles if a['criterio'] == 'Genus')
-                    exact_with_abstract = sum(1 for a in articles if a['criterio'] == 'Exacto' and a['abs_pres'] == 1)
-                    exact_without_abstract = exact_count - exact_with_abstract
-                    genus_with_abstract = sum(1 for a in articles if a['criterio'] == 'Genus' and a['abs_pres'] == 1)
-                    genus_without_abstract = genus_count - genus_with_abstract
-
-                    log(f"🔎 {species['WithoutAutorship']} | Total: {len(articles)} | "
-                        f"Exacto: {exact_count} (Abs: {exact_with_abstract}/{exact_without_abstract}) | "
-                        f"Genus: {genus_count} (Abs: {genus_with_abstract}/{genus_without_abstract})")
-
-                    pbar.update(1)
-
-        all_results.extend(chunk_results)
-        elapsed = round((time.time() - start_time) / 60, 2)
-        log(f"✅ Chunk {i} completado en {elapsed} min con {len(chunk_results)} artículos.")
-
-        # Espera de 5 minutos entre chunks, excepto después del último
-        if i < len(chunks):
-            log("⏳ Esperando 5 minutos antes de continuar con el siguiente chunk...")
-            time.sleep(300)
-
-    if all_results:
-        df = pd.DataFrame(all_results)
-        df = df.sort_values(by=["scientific name", "year", "criterio"], ascending=[True, False, True])
-        df = abstract_cleaning(df)
-        df.to_excel(OUTPUT_FILE, index=False)
-
-        # Guardar metadatos
-        wb = load_workbook(OUTPUT_FILE)
-        wb.properties.keywords = f"Filtros usados: {filters}"
-        wb.save(OUTPUT_FILE)
-        wb.close()
-
-        log(f"\n📁 Archivo generado: {OUTPUT_FILE}")
+    tasks = [
+        {
+            "genus": genus,
+            "from_index_date": refresh_dates.get(genus),
+            "until_index_date": until_index_date if incremental else None,
+        }
+        for genus in pending_groups
+    ]
+    total_articles = 0
+
+    with tqdm(total=total_species, desc="Procesando especies", unit="especies") as pbar, \
+            closing(run_genus_pipeline(tasks, pending_groups)) as genus_results:
+        for genus, species_articles, error in genus_results:
+            if error is not None:
+                # Igual que antes: la ejecución se detiene y el checkpoint permite reanudarla
+                raise error
+            save_checkpoint(checkpoint_dir, genus, species_articles)
+            write_new_articles([article for articles in species_articles.values() for article in articles])
+            set_species_refresh_dates(species_articles, until_index_date)
+
+            for species_name, articles in species_articles.items():
+                total_articles += len(articles)
+
+                # Logging detallado
+                exact_count = sum(1 for a in articles if a['criterio'] == 'Exacto')
+                genus_count = sum(1 for a in articles if a['criterio'] == 'Genus')
+                exact_with_abstract = sum(1 for a in articles if a['criterio'] == 'Exacto' and a['abs_pres'] == 1)
+                exact_without_abstract = exact_count - exact_with_abstract
+                genus_with_abstract = sum(1 for a in articles if a['criterio'] == 'Genus' and a['abs_pres'] == 1)
+                genus_without_abstract = genus_count - genus_with_abstract
+
+                log(f"🔎 {species_name} | Total: {len(articles)} | "
+                    f"Exacto: {exact_count} (Abs: {exact_with_abstract}/{exact_without_abstract}) | "
+                    f"Genus: {genus_count} (Abs: {genus_with_abstract}/{genus_without_abstract})")
+
+                pbar.update(1)
+
+    log(f"✅ {len(pending_groups)} géneros completados con {total_articles} artículos.")
+
+    if writer.rows:
+        log(f"\n📁 Dataset generado: {OUTPUT_DATASET} ({writer.rows} artículos en {writer.parts} ficheros)")
+        if export_excel:
+            export_dataset_to_excel(OUTPUT_DATASET, OUTPUT_FILE, filters)
     else:
         log("\n🚫 No se encontraron artículos nuevos.")
 
+    # La ejecución ha terminado: el siguiente arranque con estos filtros empieza de cero
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
     total_time = round((time.time() - overall_start_time) / 60, 2)
     log(f"\n⏱️ Tiempo total de ejecución: {total_time} minutos")
 
@@ -750,9 +2822,36 @@ def update_species_articles(filters=None):
 
 # Punto de entrada principal
 if __name__ == "__main__":
-    tracker.start()
-    fetcher_lists = get_fetcher_lists(filter_df)
-    update_species_articles(filters={"WithoutAutorship": fetcher_lists["Fetcher_list_VM1"]})
-    emissions = tracker.stop()
-    log(f"\n💨 Emisiones totales: {emissions} kg CO₂eq")
-    log("✅ Proceso completado.")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    log_filename = f"ROSALIA_FETCHER_LOG_{timestamp}.txt"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(message)s",
+        handlers=[
+            logging.FileHandler(log_filename, mode='w', encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+    # Los procesos de detección de idioma se crean antes que cualquier hilo (tracker, motor asíncrono, pipeline)
+    start_language_pool()
+    try:
+        tracker = OfflineEmissionsTracker(
+                country_iso_code=country_iso_code,
+                region=region,
+                cloud_provider=cloud_provider,
+                cloud_region=cloud_region,
+                country_2letter_iso_code=country_2letter_iso_code,
+                measure_power_secs=measure_power_secs,
+                pue=pue,
+                save_to_file= save_to_file
+                )
+        tracker.start()
+        fetcher_lists = get_fetcher_lists(get_filter_df())
+        update_species_articles(filters={"WithoutAutorship": fetcher_lists["Fetcher_list_VM1"]})
+        emissions = tracker.stop()
+        log(f"\n💨 Emisiones totales: {emissions} kg CO₂eq")
+        log("✅ Proceso completado.")
+    finally:
+        stop_language_pool()
@@ -0,0 +1,70 @@
+"""
+Fixtures comunes de las pruebas del fetcher. El script no tiene un nombre importable, así que se carga
+desde su ruta una sola vez. Las dependencias que las pruebas no ejercitan (clientes HTTP, parseo de
+HTML, barra de progreso, medición de emisiones) se sustituyen por módulos simulados si no están
+instaladas, para que las pruebas corran sin el entorno completo; pandas, numpy y pyarrow sí hacen falta.
+"""
+import importlib.util
+import sys
+import threading
+import types
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+FETCHER_PATH = Path(__file__).resolve().parents[1] / "ROSALIA-fetcher_VM1.py"
+# Dependencia -> submódulos que el fetcher importa de ella
+OPTIONAL_DEPENDENCIES = {
+    "requests": ["requests.adapters"],
+    "httpx": [],
+    "bs4": [],
+    "langdetect": [],
+    "tqdm": [],
+    "codecarbon": [],
+}
+
+
+@pytest.fixture(scope="session")
+def fetcher():
+    for dependency in ["pandas", "numpy", "pyarrow"]:
+        pytest.importorskip(dependency)
+    for dependency, submodules in OPTIONAL_DEPENDENCIES.items():
+        if dependency not in sys.modules and importlib.util.find_spec(dependency) is None:
+            for name in [dependency, *submodules]:
+                sys.modules[name] = mock.MagicMock(name=name)
+
+    spec = importlib.util.spec_from_file_location("rosalia_fetcher", FETCHER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def real_httpx(fetcher):
+    """El módulo httpx del fetcher; salta la prueba si se sustituyó por uno simulado."""
+    if isinstance(fetcher.httpx, mock.Mock):
+        pytest.skip("httpx no está instalado")
+    return fetcher.httpx
+
+
+@pytest.fixture
+def cache_db(fetcher, tmp_path, monkeypatch):
+    """CACHE_DB en un fichero temporal, con conexiones nuevas en cada hilo."""
+    monkeypatch.setattr(fetcher, "CACHE_DB", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(fetcher, "_cache_local", threading.local())
+    yield
+    conn = getattr(fetcher._cache_local, "conn", None)
+    if conn is not None:
+        conn.close()
+
+
+@pytest.fixture
+def clock(fetcher, monkeypatch):
+    """Sustituye time.time() dentro del fetcher por un reloj que las pruebas adelantan a mano."""
+    import time
+
+    fake = types.SimpleNamespace(now=1_000_000.0, monotonic=time.monotonic, sleep=time.sleep)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(fetcher, "time", fake)
+    return fake
@@ -0,0 +1,98 @@
+"""
+Pruebas de la caché negativa de abstracts: espera por motivo que se dobla con cada fallo seguido,
+purga de los fallos antiguos y su uso en enrich_article_abstract_async.
+"""
+import asyncio
+
+import pytest
+
+DAY = 24 * 3600
+
+
+def test_wait_doubles_with_each_failure_up_to_the_cap(fetcher, cache_db, clock):
+    fetcher.abstract_miss_put("10.1/a", "no_abstract")
+    assert fetcher.abstract_miss_get("10.1/A") == {"reason": "no_abstract", "failures": 1, "retry_at": clock.now + 7 * DAY}
+
+    fetcher.abstract_miss_put("10.1/a", "no_abstract", failures=3)
+    assert fetcher.abstract_miss_get("10.1/a")["retry_at"] == clock.now + 28 * DAY
+
+    fetcher.abstract_miss_put("10.1/a", "not_found", failures=10)
+    assert fetcher.abstract_miss_get("10.1/a")["retry_at"] == clock.now + fetcher.ABSTRACT_MISS_MAX_TTL
+
+
+def test_unknown_reason_uses_error_ttl(fetcher, cache_db, clock):
+    fetcher.abstract_miss_put("10.1/a", "desconocido")
+    assert fetcher.abstract_miss_get("10.1/a")["retry_at"] == clock.now + fetcher.ABSTRACT_MISS_TTL["error"]
+
+
+def test_purge_and_clear(fetcher, cache_db, clock):
+    fetcher.abstract_miss_put("10.1/old", "timeout")
+    clock.now += fetcher.ABSTRACT_MISS_MAX_TTL + DAY
+    fetcher.abstract_miss_put("10.1/new", "timeout")
+    fetcher.abstract_miss_purge()
+
+    assert fetcher.abstract_miss_get("10.1/old") is None
+    assert fetcher.abstract_miss_get("10.1/new") is not None
+
+    fetcher.abstract_miss_clear("10.1/new")
+    assert fetcher.abstract_miss_get("10.1/new") is None
+
+
+@pytest.fixture
+def lookups(fetcher, monkeypatch):
+    """Sustituye las consultas a la web y a Semantic Scholar por respuestas fijas, contando las llamadas."""
+    state = {"web": ("", "no_abstract"), "s2": ("", "no_abstract"), "calls": 0}
+
+    async def web(url):
+        state["calls"] += 1
+        return state["web"]
+
+    async def semantic_scholar(doi, title):
+        return state["s2"]
+
+    monkeypatch.setattr(fetcher, "lookup_abstract_from_web_async", web)
+    monkeypatch.setattr(fetcher, "lookup_abstract_from_semantic_scholar_async", semantic_scholar)
+    return state
+
+
+def enrich(fetcher):
+    article = {"DOI": "10.1/a", "title": "Quercus", "url": "https://publisher.example/a", "abstract": ""}
+    return asyncio.run(fetcher.enrich_article_abstract_async(article))
+
+
+def test_enrich_backs_off_until_retry_at(fetcher, cache_db, clock, lookups):
+    assert enrich(fetcher)["abs_pres"] == 0
+    assert lookups["calls"] == 1
+
+    # Dentro de la espera no se vuelve a consultar
+    clock.now += 6 * DAY
+    enrich(fetcher)
+    assert lookups["calls"] == 1
+
+    # Pasada la espera se consulta de nuevo y, si vuelve a fallar, la espera se dobla
+    clock.now += DAY
+    enrich(fetcher)
+    assert lookups["calls"] == 2
+    assert fetcher.abstract_miss_get("10.1/a") == {"reason": "no_abstract", "failures": 2, "retry_at": clock.now + 14 * DAY}
+
+
+def test_enrich_keeps_the_shorter_wait_of_both_sources(fetcher, cache_db, clock, lookups):
+    lookups["web"] = ("", "not_found")
+    enrich(fetcher)
+    assert fetcher.abstract_miss_get("10.1/a")["reason"] == "no_abstract"
+
+
+def test_enrich_does_not_record_semantic_scholar_failures(fetcher, cache_db, clock, lookups):
+    lookups["s2"] = ("", "timeout")
+    enrich(fetcher)
+    assert fetcher.abstract_miss_get("10.1/a") is None
+
+
+def test_enrich_clears_miss_when_found(fetcher, cache_db, clock, lookups):
+    enrich(fetcher)
+    clock.now += 7 * DAY
+    lookups["web"] = ("Quercus abstract", None)
+
+    article = enrich(fetcher)
+    assert article["abstract"] == "Quercus abstract" and article["abs_pres"] == 1
+    assert fetcher.abstract_miss_get("10.1/a") is None
@@ -0,0 +1,55 @@
+"""
+Pruebas de la caché persistente de metadatos por DOI: normalización de claves, caducidad por
+DOI_CACHE_TTL y expulsión de las entradas menos usadas al superar DOI_CACHE_MAX_ENTRIES.
+"""
+
+
+def cached_dois(fetcher):
+    return {row[0] for row in fetcher.get_cache_connection().execute("SELECT doi FROM doi_cache")}
+
+
+def test_put_get_keeps_crossref_fields(fetcher, cache_db, clock):
+    item = {"DOI": "10.1/ABC", "title": ["Quercus"], "reference": ["muy largo"], "abstract": "texto"}
+    fetcher.doi_cache_put("https://doi.org/10.1/ABC", item)
+
+    assert cached_dois(fetcher) == {"10.1/abc"}
+    assert fetcher.doi_cache_get("doi: 10.1/abc") == {"DOI": "10.1/ABC", "title": ["Quercus"], "abstract": "texto"}
+    assert fetcher.doi_cache_get("10.1/otro") is None
+
+
+def test_expired_entry_is_dropped(fetcher, cache_db, clock):
+    fetcher.doi_cache_put("10.1/a", {"DOI": "10.1/a"})
+    clock.now += fetcher.DOI_CACHE_TTL + 1
+
+    assert fetcher.doi_cache_get("10.1/a") is None
+    assert cached_dois(fetcher) == set()
+
+
+def test_size_is_checked_every_n_inserts(fetcher, cache_db, clock, monkeypatch):
+    monkeypatch.setattr(fetcher, "DOI_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(fetcher, "DOI_CACHE_CHECK_EVERY", 3)
+
+    for n in range(3):
+        clock.now += 1
+        fetcher.doi_cache_put(f"10.1/{n}", {"DOI": f"10.1/{n}"})
+    assert cached_dois(fetcher) == {"10.1/1", "10.1/2"}
+
+    # Hasta la siguiente comprobación la caché puede pasarse del máximo
+    clock.now += 1
+    fetcher.doi_cache_put("10.1/3", {"DOI": "10.1/3"})
+    assert len(cached_dois(fetcher)) == 3
+
+
+def test_eviction_keeps_recently_used(fetcher, cache_db, clock, monkeypatch):
+    monkeypatch.setattr(fetcher, "DOI_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(fetcher, "DOI_CACHE_CHECK_EVERY", 1)
+
+    for n in range(2):
+        clock.now += 1
+        fetcher.doi_cache_put(f"10.1/{n}", {"DOI": f"10.1/{n}"})
+    clock.now += 1
+    assert fetcher.doi_cache_get("10.1/0") is not None  # 10.1/0 pasa a ser el más reciente
+    clock.now += 1
+    fetcher.doi_cache_put("10.1/2", {"DOI": "10.1/2"})
+
+    assert cached_dois(fetcher) == {"10.1/0", "10.1/2"}
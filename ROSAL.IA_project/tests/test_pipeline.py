@@ -0,0 +1,91 @@
+"""
+Pruebas del pipeline por etapas de géneros (run_genus_pipeline): un fallo en cualquier etapa debe
+llegar a quien lee los resultados, y cerrar el generador antes de tiempo debe parar los hilos.
+"""
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+TIMEOUT = 30  # Segundos: si el pipeline se cuelga, la prueba falla en lugar de bloquearse
+
+
+@pytest.fixture
+def fake_stages(fetcher, monkeypatch):
+    """Sustituye las etapas con red por otras locales; los géneros "Broken*" fallan en la etapa indicada."""
+    def search_stage(task):
+        genus = task["genus"]
+        if genus == "Brokensearch":
+            raise RuntimeError("búsqueda caída")
+        for n in range(3):
+            yield ("article", genus, {"DOI": f"10.1/{genus}.{n}"})
+        yield ("searched", genus, 3, None)
+
+    def resolve_stage(message):
+        if message[0] == "article" and message[1] == "Brokenresolve":
+            raise RuntimeError("resolución caída")
+        return [message]
+
+    monkeypatch.setattr(fetcher, "search_stage", search_stage)
+    monkeypatch.setattr(fetcher, "resolve_stage", resolve_stage)
+    monkeypatch.setattr(fetcher, "enrich_stage", lambda message: [message])
+    monkeypatch.setattr(fetcher, "classify_articles", lambda articles, name: list(articles))
+
+
+def collect(fetcher, genera):
+    """Lee todos los resultados del pipeline en un hilo aparte, fallando si no termina a tiempo."""
+    results = []
+    tasks = [{"genus": genus} for genus in genera]
+
+    def consume():
+        with closing(fetcher.run_genus_pipeline(tasks, {genus: [f"{genus} sp."] for genus in genera})) as genus_results:
+            results.extend(genus_results)
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    thread.join(TIMEOUT)
+    assert not thread.is_alive(), "el pipeline no entregó todos los géneros"
+    return {genus: (species_articles, error) for genus, species_articles, error in results}
+
+
+def wait_for_stage_threads_to_stop():
+    deadline = time.monotonic() + TIMEOUT
+    stages = ("rosalia-search-", "rosalia-resolve-", "rosalia-enrich-", "rosalia-classify-")
+    while any(thread.name.startswith(stages) for thread in threading.enumerate()):
+        assert time.monotonic() < deadline, "los hilos del pipeline siguen vivos tras cerrarlo"
+        time.sleep(0.05)
+
+
+def test_all_genera_complete(fetcher, fake_stages):
+    results = collect(fetcher, ["Quercus", "Lynx"])
+
+    assert set(results) == {"Quercus", "Lynx"}
+    for genus, (species_articles, error) in results.items():
+        assert error is None
+        assert len(species_articles[f"{genus} sp."]) == 3
+    wait_for_stage_threads_to_stop()
+
+
+@pytest.mark.parametrize("broken", ["Brokensearch", "Brokenresolve"])
+def test_stage_failure_reaches_consumer(fetcher, fake_stages, broken):
+    results = collect(fetcher, ["Quercus", broken, "Lynx"])
+
+    assert set(results) == {"Quercus", broken, "Lynx"}
+    species_articles, error = results[broken]
+    assert isinstance(error, RuntimeError)
+    assert species_articles == {}
+    assert results["Quercus"][1] is None and results["Lynx"][1] is None
+    wait_for_stage_threads_to_stop()
+
+
+def test_consumer_error_stops_pipeline(fetcher, fake_stages):
+    genera = [f"Genus{n}" for n in range(50)]
+    tasks = [{"genus": genus} for genus in genera]
+
+    with pytest.raises(RuntimeError):
+        with closing(fetcher.run_genus_pipeline(tasks, {genus: [f"{genus} sp."] for genus in genera})) as genus_results:
+            for _ in genus_results:
+                raise RuntimeError("fallo de quien consume")
+
+    wait_for_stage_threads_to_stop()
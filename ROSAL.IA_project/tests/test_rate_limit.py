@@ -0,0 +1,125 @@
+"""
+Pruebas del limitador por host (token bucket, Retry-After y cabeceras X-Rate-Limit-* de CrossRef)
+y del reintento de los 429 en http_get y en el motor asíncrono.
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+
+def response(status_code=200, **headers):
+    return SimpleNamespace(status_code=status_code, headers=headers)
+
+
+@pytest.fixture
+def fast_limits(fetcher, monkeypatch):
+    """Limitadores nuevos y con un ritmo alto, para que los reintentos no hagan esperar a las pruebas."""
+    monkeypatch.setattr(fetcher, "_rate_limiters", {})
+    monkeypatch.setattr(fetcher, "HOST_RATE_LIMITS", {})
+    monkeypatch.setattr(fetcher, "DEFAULT_HOST_RATE_LIMIT", 1000)
+
+
+def test_token_bucket_spreads_requests(fetcher):
+    limiter = fetcher.HostRateLimiter(2)
+
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    assert 0.45 < limiter.reserve() <= 0.5
+
+
+def test_429_halves_rate_and_honours_retry_after(fetcher):
+    limiter = fetcher.HostRateLimiter(4)
+    limiter.observe(response(429, **{"Retry-After": "7"}))
+
+    assert limiter.rate == 2
+    assert limiter.reserve() > 6.9
+
+
+def test_429_without_retry_after_waits_backoff(fetcher):
+    limiter = fetcher.HostRateLimiter(4)
+    limiter.observe(response(429))
+
+    assert limiter.reserve() > fetcher.RETRY_BACKOFF - 0.1
+
+
+def test_rate_recovers_and_has_a_floor(fetcher):
+    limiter = fetcher.HostRateLimiter(4)
+    for _ in range(20):
+        limiter.observe(response(429, **{"Retry-After": "0"}))
+    assert limiter.rate == fetcher.MIN_HOST_RATE
+
+    for _ in range(40):
+        limiter.observe(response(200))
+    assert limiter.rate == 4
+
+
+def test_adopts_crossref_rate_limit_headers(fetcher):
+    limiter = fetcher.HostRateLimiter(5)
+    limiter.observe(response(200, **{"X-Rate-Limit-Limit": "50", "X-Rate-Limit-Interval": "1s"}))
+
+    assert limiter.max_rate == pytest.approx(50 * fetcher.RATE_LIMIT_SAFETY)
+    assert limiter.capacity == pytest.approx(50 * fetcher.RATE_LIMIT_SAFETY)
+
+
+def test_parse_retry_after(fetcher):
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+
+    assert fetcher.parse_retry_after("5") == 5.0
+    assert fetcher.parse_retry_after("-3") == 0.0
+    assert 55 < fetcher.parse_retry_after(in_a_minute) <= 60
+    assert fetcher.parse_retry_after("pronto") is None
+    assert fetcher.parse_retry_after(None) is None
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return response(self.statuses.pop(0), **{"Retry-After": "0"})
+
+
+def test_http_get_retries_429(fetcher, fast_limits):
+    session = FakeSession([429, 429, 200])
+
+    assert fetcher.http_get("https://api.example.org/works", session=session).status_code == 200
+    assert session.calls == 3
+
+
+def test_http_get_gives_up_after_max_retries(fetcher, fast_limits, monkeypatch):
+    monkeypatch.setattr(fetcher, "MAX_RETRIES", 3)
+    session = FakeSession([429] * 5)
+
+    assert fetcher.http_get("https://api.example.org/works", session=session).status_code == 429
+    assert session.calls == 3
+
+
+@pytest.fixture
+def engine(fetcher, real_httpx, fast_limits):
+    engine = fetcher.AsyncFetchEngine()
+    yield engine
+    engine.loop.call_soon_threadsafe(engine.loop.stop)
+
+
+def test_engine_retries_429_on_each_redirect_hop(fetcher, real_httpx, engine):
+    requests = []
+    publisher_statuses = [429, 200]
+
+    def handler(request):
+        requests.append(request.url.host)
+        if request.url.host == "doi.org":
+            return real_httpx.Response(302, headers={"Location": "https://publisher.example/article"})
+        return real_httpx.Response(publisher_statuses.pop(0), headers={"Retry-After": "0"}, text="ok")
+
+    engine.client = real_httpx.AsyncClient(transport=real_httpx.MockTransport(handler), follow_redirects=False)
+    result = engine.run(engine.get("https://doi.org/10.1/abc"))
+
+    assert result.status_code == 200
+    assert requests == ["doi.org", "publisher.example", "publisher.example"]
+    # Cada salto espera al limitador de su propio host
+    assert {"doi.org", "publisher.example"} <= set(fetcher.get_rate_limiters())
+    assert fetcher.get_rate_limiters()["publisher.example"].rate < fetcher.DEFAULT_HOST_RATE_LIMIT